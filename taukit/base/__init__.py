@@ -0,0 +1,14 @@
+"""Base classes and decorators.
+
+Public objects are imported lazily on the first access.
+"""
+from ..utils import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'interface': '.decorators',
+    'Composable': '.metacls',
+    'Singleton': '.metacls',
+    'Validator': '.validators',
+    'ValidatorPool': '.validators',
+    'CompiledSchema': '.validators'
+})
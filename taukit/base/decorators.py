@@ -1,22 +1,65 @@
 """Decorators."""
+import os
 from inspect import signature
-from .validators import Validator
+from .validators import Validator, ValidatorPool
 
+SKIP_VALIDATION_ENV = 'TAUKIT_SKIP_INTERFACE_VALIDATION'
 
-def interface(schema, validator_cls=Validator):
-    """Interface decorator."""
-    # pylint: disable=unused-argument,protected-access
+
+def _skip_validation():
+    """Check if production mode of the interface decorator is enabled."""
+    return os.environ.get(SKIP_VALIDATION_ENV, '').lower() in ('1', 'true', 'yes')
+
+def interface(schema, validator_cls=Validator, skip_validation=None):
+    """Interface decorator.
+
+    Signature of a decorated function is inspected only once
+    and arguments are validated with a compiled schema.
+    If validity of arguments depends only on their types
+    (see :py:attr:`taukit.base.validators.CompiledSchema.type_determined`)
+    then argument type signatures that were already validated are not checked again.
+    Validators are taken from a :py:class:`taukit.base.validators.ValidatorPool`,
+    so decorated functions may be called concurrently from many threads.
+
+    Parameters
+    ----------
+    schema : dict
+        Schema of arguments.
+    validator_cls : type
+        Validator class.
+    skip_validation : bool or None
+        Validate only on the first call per argument type signature.
+        Normalization rules are still applied on every call.
+        If ``None`` then it is enabled if ``TAUKIT_SKIP_INTERFACE_VALIDATION``
+        environment variable is set to ``1``, ``true`` or ``yes``.
+    """
+    # pylint: disable=protected-access
+    if skip_validation is None:
+        skip_validation = _skip_validation()
     def decorator(func):
-        validator = validator_cls({ **getattr(func, '_schema', {}), **schema })
+        params = tuple(signature(getattr(func, '_f', func)).parameters)
+        pool = ValidatorPool({ **getattr(func, '_schema', {}), **schema }, validator_cls)
+        cache_types = skip_validation or pool.get().compiled.type_determined
+        validated_types = set()
         def wrapper(*args, **kwds):
-            sig = signature(getattr(func, '_f', func))
-            args__ = { k: v for v, k in zip(locals()['args'], sig.parameters.keys()) }
-            args__.update(locals()['kwds'])
-            args__ = validator.validated(args__)
+            compiled = pool.get().compiled
+            args__ = dict(zip(params, args))
+            args__.update(kwds)
+            if cache_types:
+                key = tuple((k, type(v)) for k, v in args__.items())
+                if key in validated_types:
+                    if compiled.normalizes:
+                        args__ = compiled.normalized(args__)
+                        if args__ is None:
+                            raise ValueError(compiled.errors)
+                    return func(**args__)
+            args__ = compiled.validated(args__)
             if args__ is None:
-                raise ValueError(validator.errors)
+                raise ValueError(compiled.errors)
+            if cache_types:
+                validated_types.add(key)
             return func(**args__)
         wrapper._f = getattr(func, '_f', func)
-        wrapper._schema = validator._schema
+        wrapper._schema = pool.schema
         return wrapper
     return decorator
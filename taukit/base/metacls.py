@@ -3,27 +3,162 @@
 from collections import OrderedDict
 
 
-def _getattr(self, attr):
-    """Attribute lookup for composable classes."""
-    components_attr = '_'+self.__class__.__name__+'__components'
-    components = [
-        *(getattr(self, '__components').items() if '__components' in dir(self) else []),
-        *(getattr(self, components_attr).items() if components_attr in dir(self) else [])
-    ]
-    bases = (self.__class__, *self.__class__.__bases__)
-    for base in bases:
-        components_attr = '_'+base.__name__+'__components'
-        components = [ *components, *getattr(base, components_attr, {}).items() ]
+_missing = object()
+
+
+def _index(components):
+    """Build attribute owner index.
+
+    Parameters
+    ----------
+    components : iterable of 2-tuples
+        Components names and objects in the lookup order.
+
+    Returns
+    -------
+    dict
+        Mapping from attribute names to the first component providing them.
+        Special (double underscore) attributes are not indexed.
+    """
+    index = {}
+    for _, component in components:
+        for attr in dir(component):
+            if not attr.startswith('__'):
+                index.setdefault(attr, component)
+    return index
+
+def _lookup(components, index, attr):
+    """Look up attribute in components.
+
+    Parameters
+    ----------
+    components : iterable of 2-tuples
+        Components names and objects in the lookup order.
+    index : dict
+        Attribute owner index. Attributes not found in it
+        are searched for in components and the index is updated in place.
+    attr : str
+        Attribute name.
+
+    Returns
+    -------
+    any
+        Attribute value or ``_missing`` if no component provides it.
+    """
+    component = index.get(attr, _missing)
+    if component is not _missing:
+        try:
+            return getattr(component, attr)
+        except AttributeError:
+            del index[attr]
     for nm, component in components:
         if nm == attr:
             return component
+        value = getattr(component, attr, _missing)
+        if value is not _missing:
+            index[attr] = component
+            return value
+    return _missing
+
+def _find(components, index, attr):
+    """Find component owning an attribute.
+
+    Parameters are the same as in :py:func:`_lookup`.
+
+    Returns
+    -------
+    any
+        Component or ``_missing`` if no component provides the attribute.
+    """
+    component = index.get(attr, _missing)
+    if component is not _missing and hasattr(component, attr):
+        return component
+    for _, component in components:
+        if hasattr(component, attr):
+            index[attr] = component
+            return component
+    index.pop(attr, None)
+    return _missing
+
+def _getinstance(self):
+    """Get instance level components and their attribute owner index.
+
+    Attributes are read with :py:meth:`object.__getattribute__`,
+    so ``__getattr__`` is not called recursively
+    and instances with ``__slots__`` are supported.
+
+    Returns
+    -------
+    tuple
+        Components dict (or ``None``) and attribute owner index.
+    """
+    try:
+        components = object.__getattribute__(self, '__components')
+    except AttributeError:
+        return None, None
+    try:
+        index = object.__getattribute__(self, '__attrindex')
+    except AttributeError:
+        index = {}
         try:
-            return getattr(component, attr)
+            object.__setattr__(self, '__attrindex', index)
         except AttributeError:
             pass
-    cn = self.__class__.__name__
+    return components, index
+
+def _getowner(self, attr):
+    """Get instance or class level component owning an attribute."""
+    components, index = _getinstance(self)
+    if components:
+        owner = _find(components.items(), index, attr)
+        if owner is not _missing:
+            return owner
+    namespace = vars(self.__class__)
+    return _find(namespace['__classcomponents'], namespace['__classattrindex'], attr)
+
+def _getattr(self, attr):
+    """Attribute lookup for composable classes."""
+    components, index = _getinstance(self)
+    if components:
+        value = _lookup(components.items(), index, attr)
+        if value is not _missing:
+            return value
+    cls = self.__class__
+    namespace = vars(cls)
+    value = _lookup(namespace['__classcomponents'], namespace['__classattrindex'], attr)
+    if value is not _missing:
+        return value
+    cn = cls.__name__
     raise AttributeError(f"'{cn}' does not have attribute '{attr}'")
 
+class _Delegated:
+    """Descriptor delegating attribute access to a class level component.
+
+    Instance level components keep precedence over the component,
+    so the delegation order is the same as in :py:func:`_getattr`.
+    """
+    def __init__(self, attr, component):
+        """Initialization method.
+
+        Parameters
+        ----------
+        attr : str
+            Attribute name.
+        component : any
+            Component object.
+        """
+        self.attr = attr
+        self.component = component
+
+    def __get__(self, obj, objtype=None):
+        if obj is not None:
+            components, index = _getinstance(obj)
+            if components:
+                value = _lookup(components.items(), index, self.attr)
+                if value is not _missing:
+                    return value
+        return getattr(self.component, self.attr)
+
 def _getcomponents(self, clsname=None):
     """Get components dictionary.
 
@@ -72,20 +207,44 @@ def _setcomponents(self, components):
             raise AttributeError(errmsg)
         setattr(self, nm, component)
     self.__components = OrderedDict(components)
+    self.__attrindex = _index(self.__components.items())
 
-def _getattribute(self, attr, component, clsname=None):
+def _reindex(self):
+    """Rebuild attribute owner indexes.
+
+    It has to be called when attributes are added to or removed from
+    components directly (not with :py:meth:`_setattribute`),
+    so a component earlier in the lookup order may now own an attribute.
+    Class level index is shared by all instances of the class.
+    """
+    components, index = _getinstance(self)
+    if components:
+        index.clear()
+        index.update(_index(components.items()))
+    namespace = vars(self.__class__)
+    namespace['__classattrindex'].clear()
+    namespace['__classattrindex'].update(_index(namespace['__classcomponents']))
+
+def _getattribute(self, attr, component=None, clsname=None):
     """Get attribute value from a class components.
 
     Parameters
     ----------
     attr : str
         Attribute name.
-    component : str
+    component : str or None
         Component name.
+        If `None` then attribute is taken from the first component
+        providing it according to the attribute owner index.
     clsname : str
         Optional class name.
         If `None` then instance components are searched.
     """
+    if component is None:
+        owner = _getowner(self, attr)
+        if owner is _missing:
+            raise AttributeError(f"No component with '{attr}' attribute was found")
+        return getattr(owner, attr)
     components = self._getcomponents(clsname)
     try:
         component = components[component]
@@ -96,6 +255,11 @@ def _getattribute(self, attr, component, clsname=None):
 def _setattribute(self, attr, value, on_component=True):
     """Set attribute on instance or on a component.
 
+    Components owning attributes are found with the attribute owner index
+    maintained by the metaclass and :py:meth:`_setcomponents`.
+    Setting an attribute on a named component invalidates
+    its index entries, so the lookup order is preserved.
+
     Parameters
     ----------
     attr : str
@@ -115,17 +279,26 @@ def _setattribute(self, attr, value, on_component=True):
     if not on_component:
         setattr(self, attr, value)
         return
-    components = \
-        [ *(getattr(self, '__components') if '__components' in dir(self) else {}).items() ]
-    bases = (self.__class__, *self.__class__.__bases__)
-    for base in bases:
-        components_attr = '_'+base.__name__+'__components'
-        components = [ *components, *getattr(base, components_attr, {}).items() ]
-    for _, component in components:
-        if hasattr(component, attr):
-            setattr(component, attr, value)
-            return
-    raise AttributeError(f"No component with '{attr}' attribute was found")
+    if isinstance(on_component, str):
+        instance_components, index = _getinstance(self)
+        namespace = vars(self.__class__)
+        components = [
+            *(instance_components or {}).items(),
+            *namespace['__classcomponents']
+        ]
+        for nm, component in components:
+            if nm == on_component:
+                setattr(component, attr, value)
+                # The component may now precede the indexed owner.
+                if index is not None:
+                    index.pop(attr, None)
+                namespace['__classattrindex'].pop(attr, None)
+                return
+        raise AttributeError(f"No component named '{on_component}' was found")
+    component = _getowner(self, attr)
+    if component is _missing:
+        raise AttributeError(f"No component with '{attr}' attribute was found")
+    setattr(component, attr, value)
 
 
 class Composable(type):
@@ -149,7 +322,28 @@ class Composable(type):
 
     Also method delegation order is important, as first instance level
     components will be searched and then class level components in
-    the standard order.
+    the standard order (following the method resolution order of the class).
+
+    Components providing delegated attributes are kept in attribute owner
+    indexes, built for class level components at class creation time
+    and for instance level components by :py:meth:`_setcomponents`,
+    so a delegated lookup costs one or two dictionary lookups.
+    Attributes added to components later are searched for on the first
+    lookup and then indexed as well. However, if an attribute already
+    owned by a component is added directly to a component earlier
+    in the lookup order, then the index still points to the old owner
+    until :py:meth:`_reindex` is called (:py:meth:`_setattribute`
+    keeps the indexes up to date by itself). The same applies to
+    delegation descriptors (see below), which are bound at class creation time.
+
+    Attributes delegation may be also resolved at class creation time
+    by passing ``delegate=True`` keyword argument in the class definition,
+    i.e. ``class Host(metaclass=Composable, delegate=True)``.
+    Then public attributes of class level components are exposed as
+    descriptors defined on the class, so delegated access costs a normal
+    attribute lookup. Instance level components still take precedence
+    and attributes not known at class creation time are resolved dynamically.
+    The option is inherited by subclasses.
 
     Notes
     -----
@@ -168,6 +362,7 @@ class Composable(type):
     * :py:meth:`smcore.base.meta._setcomponents`,
     * :py:meth:`smcore.base.meta._getattribute`
     * :py:meth:`smcore.base.meta._setattribute`,
+    * :py:meth:`smcore.base.meta._reindex`,
 
     are defined with leading underscores to avoid name collisions,
     not because they are private.
@@ -181,6 +376,7 @@ class Composable(type):
         setattr(newclass, _getcomponent.__name__, _getcomponent)
         setattr(newclass, _getattribute.__name__, _getattribute)
         setattr(newclass, _setattribute.__name__, _setattribute)
+        setattr(newclass, _reindex.__name__, _reindex)
         components_attr = '_'+newclass.__name__+'__components'
         components = getattr(newclass, components_attr, None)
         if components:
@@ -190,8 +386,40 @@ class Composable(type):
                 errmsg = f"Class '{nm}' already has attribute '{newclass.__name__}'"
                 raise AttributeError(errmsg)
             setattr(newclass, nm, component)
+        classcomponents = []
+        for base in newclass.__mro__:
+            components_attr = '_'+base.__name__+'__components'
+            classcomponents.extend(vars(base).get(components_attr, {}).items())
+        setattr(newclass, '__classcomponents', tuple(classcomponents))
+        setattr(newclass, '__classattrindex', _index(classcomponents))
+        delegate = kwds.get('delegate', getattr(newclass, '__delegate', False))
+        setattr(newclass, '__delegate', delegate)
+        if delegate:
+            cls._delegate(newclass, classcomponents)
         return newclass
 
+    @staticmethod
+    def _delegate(newclass, components):
+        """Define descriptors for public attributes of class level components.
+
+        Attributes defined on the class or its bases are not overridden,
+        except descriptors delegating to components of the base classes.
+        """
+        seen = set()
+        for _, component in components:
+            for attr in dir(component):
+                if attr.startswith('_') or attr in seen:
+                    continue
+                seen.add(attr)
+                for base in newclass.__mro__:
+                    if attr in vars(base):
+                        existing = vars(base)[attr]
+                        break
+                else:
+                    existing = _missing
+                if existing is _missing or isinstance(existing, _Delegated):
+                    setattr(newclass, attr, _Delegated(attr, component))
+
 
 class Singleton(type):
     """Singleton metaclass."""
@@ -1,15 +1,233 @@
 """Base validator classes."""
-from collections.abc import Callable, Iterable, Sequence, Mapping
+from collections.abc import Callable, Iterable, Sequence, Mapping, Sized
+from copy import copy
+from threading import local
 from cerberus import Validator as _Validator, TypeDefinition
+from cerberus.schema import DefinitionSchema
 
 
-def copy_schema(schema):
-    """Copy schema definition."""
+def copy_schema(schema, shared=False):
+    """Copy schema definition.
+
+    Parameters
+    ----------
+    schema : dict, cerberus.schema.DefinitionSchema or Validator
+        Schema definition or a validator.
+    shared : bool
+        Should already parsed schema objects be returned as they are.
+        Parsed schemas are not validated again when passed to a validator,
+        so they may be shared between validator instances.
+    """
     if isinstance(schema, Validator):
         schema = schema.schema
+    if shared and isinstance(schema, DefinitionSchema):
+        return schema
     return dict(schema.copy())
 
 
+class _Unsupported(Exception):
+    """Raised when a schema or a document must be handled by *Cerberus*."""
+
+
+class CompiledSchema:
+    """Schema compiled into specialized normalization and validation functions.
+
+    Only a subset of rules is compiled (see :py:attr:`rules`).
+    Schemas using any other rule, as well as documents for which the fast path
+    fails (i.e. coercion errors or invalid documents), are delegated to the
+    underlying validator, so results and error messages are always the same
+    as the ones produced by *Cerberus*.
+
+    Attributes
+    ----------
+    validator : Validator
+        Validator used as a fallback.
+    schema : cerberus.schema.DefinitionSchema
+        Compiled schema.
+    errors : dict
+        Errors of the last processed document.
+    is_compiled : bool
+        Is the fast path available.
+        If ``False`` then all calls are delegated to the validator.
+    normalizes : bool
+        Can normalization change a document.
+    type_determined : bool
+        Does validity of a document depend only on its keys
+        and types of its values.
+    """
+    rules = frozenset(('type', 'coerce', 'default', 'nullable', 'required', 'empty'))
+
+    def __init__(self, validator):
+        """Initialization method.
+
+        Parameters
+        ----------
+        validator : Validator
+            Validator providing schema and configuration.
+        """
+        self.validator = validator
+        self.schema = validator.schema
+        self.errors = {}
+        self.normalizes = True
+        self.type_determined = False
+        try:
+            self._normalize, self._check = self._compile()
+            self.is_compiled = True
+        except _Unsupported:
+            self._normalize = self._check = None
+            self.is_compiled = False
+
+    def normalized(self, document):
+        """Get normalized copy of a document or ``None`` in case of errors."""
+        if self.is_compiled and isinstance(document, Mapping):
+            try:
+                document = self._normalize(document)
+                self.errors = {}
+                return document
+            except _Unsupported:
+                pass
+        return self._fallback('normalized', document)
+
+    def validate(self, document):
+        """Validate a document."""
+        if self.is_compiled and isinstance(document, Mapping):
+            try:
+                if self._check(self._normalize(document)):
+                    self.errors = {}
+                    return True
+            except _Unsupported:
+                pass
+        return self._fallback('validate', document)
+
+    def validated(self, document):
+        """Get normalized copy of a valid document or ``None`` if it is not valid."""
+        if self.is_compiled and isinstance(document, Mapping):
+            try:
+                normalized = self._normalize(document)
+                if self._check(normalized):
+                    self.errors = {}
+                    return normalized
+            except _Unsupported:
+                pass
+        return self._fallback('validated', document)
+
+    def _fallback(self, method, document):
+        result = getattr(self.validator, method)(document)
+        self.errors = self.validator.errors
+        return result
+
+    # Compilation -------------------------------------------------------------
+
+    def _compile(self):
+        """Compile schema into normalization and checking functions.
+
+        Raises
+        ------
+        _Unsupported
+            If schema or validator configuration can not be compiled.
+        """
+        validator = self.validator
+        schema = self.schema
+        if schema is None or isinstance(schema, str) \
+        or isinstance(validator.allow_unknown, Mapping) \
+        or validator.require_all or validator.ignore_none_values:
+            raise _Unsupported
+        defaults = []
+        coercers = []
+        checks = []
+        required = []
+        for field, definition in schema.items():
+            if not isinstance(definition, Mapping) or not self.rules.issuperset(definition):
+                raise _Unsupported
+            nullable = definition.get('nullable', False)
+            if 'default' in definition:
+                defaults.append((field, definition['default'], nullable))
+            if 'coerce' in definition:
+                coercers.append((field, self._get_coercers(definition['coerce']), nullable))
+            types = self._get_types(definition.get('type'))
+            checks.append((field, types, nullable, definition.get('empty', True)))
+            if definition.get('required', False):
+                required.append(field)
+
+        known = frozenset(schema)
+        purge = validator.purge_unknown and not validator.allow_unknown
+        allow_unknown = validator.allow_unknown or purge
+        self.normalizes = bool(purge or defaults or coercers)
+        self.type_determined = \
+            not self.normalizes and all(empty for *_, empty in checks)
+
+        def normalize(document):
+            document = copy(document)
+            if purge:
+                for field in [ f for f in document if f not in known ]:
+                    del document[field]
+            for field, value, nullable in defaults:
+                if field not in document or (document[field] is None and not nullable):
+                    document[field] = value
+            for field, processors, nullable in coercers:
+                if field not in document:
+                    continue
+                value = document[field]
+                for processor in processors:
+                    try:
+                        value = processor(value)
+                    except Exception: # pylint: disable=broad-except
+                        if not (nullable and value is None):
+                            raise _Unsupported
+                document[field] = value
+            return document
+
+        def check(document):
+            if not allow_unknown:
+                for field in document:
+                    if field not in known:
+                        return False
+            for field in required:
+                if field not in document:
+                    return False
+            for field, types, nullable, empty in checks:
+                if field not in document:
+                    continue
+                value = document[field]
+                if value is None:
+                    if nullable:
+                        continue
+                    return False
+                if types and not any(
+                        isinstance(value, included) and not isinstance(value, excluded)
+                        for included, excluded in types
+                    ):
+                    return False
+                if not empty and isinstance(value, Sized) and not value:
+                    return False
+            return True
+
+        return normalize, check
+
+    def _get_coercers(self, coerce):
+        if isinstance(coerce, str):
+            try:
+                return [ getattr(self.validator, '_normalize_coerce_'+coerce) ]
+            except AttributeError:
+                raise _Unsupported
+        if isinstance(coerce, Iterable):
+            return [ p for c in coerce for p in self._get_coercers(c) ]
+        return [ coerce ]
+
+    def _get_types(self, data_type):
+        if not data_type:
+            return ()
+        if isinstance(data_type, str):
+            data_type = (data_type,)
+        types = []
+        for _type in data_type:
+            definition = self.validator.types_mapping.get(_type)
+            if definition is None:
+                raise _Unsupported
+            types.append((definition.included_types, definition.excluded_types))
+        return tuple(types)
+
+
 class Validator(_Validator):
     """Base validator extends standard *Cerberos* validator with more types."""
     types_mapping = _Validator.types_mapping.copy()
@@ -27,3 +245,116 @@ class Validator(_Validator):
         """
         kwds.update(allow_unknown=allow_unknown, purge_unknown=purge_unknown)
         super().__init__(*args, **kwds)
+        self._compiled = None
+
+    @property
+    def compiled(self):
+        """Compiled version of the schema.
+
+        It is created once and recompiled only if the schema is replaced.
+
+        See Also
+        --------
+        CompiledSchema : Compiled schema class.
+        """
+        if self._compiled is None or self._compiled.schema is not self.schema:
+            self._compiled = CompiledSchema(self)
+        return self._compiled
+
+    def validate_many(self, records):
+        """Validate a batch of documents.
+
+        Schema is compiled once for the entire batch
+        and errors are reported only for invalid documents.
+
+        Parameters
+        ----------
+        records : iterable of mappings
+            Documents to validate.
+
+        Returns
+        -------
+        dict
+            Errors of invalid documents indexed by their positions.
+            Empty if all documents are valid.
+        """
+        validate = self.compiled.validate
+        report = {}
+        for idx, record in enumerate(records):
+            if not validate(record):
+                report[idx] = self._compiled.errors
+        return report
+
+    def normalized_many(self, records):
+        """Normalize a batch of documents.
+
+        Parameters
+        ----------
+        records : iterable of mappings
+            Documents to normalize.
+
+        Returns
+        -------
+        list
+            Normalized documents with ``None`` in place of documents
+            that could not be normalized.
+        dict
+            Errors of documents that could not be normalized
+            indexed by their positions.
+        """
+        normalized = self.compiled.normalized
+        documents = []
+        report = {}
+        for idx, record in enumerate(records):
+            document = normalized(record)
+            if document is None:
+                report[idx] = self._compiled.errors
+            documents.append(document)
+        return documents, report
+
+
+class ValidatorPool:
+    """Pool of validators sharing one parsed schema.
+
+    *Cerberus* validators are stateful, so they can not be used
+    concurrently. Pool hands out separate validator instances
+    for every thread, but the schema is parsed only once
+    and the parsed schema object is shared between all of them.
+
+    Attributes
+    ----------
+    schema : cerberus.schema.DefinitionSchema
+        Parsed schema.
+    validator_cls : type
+        Validator class.
+    kwds : dict
+        Keyword arguments passed to the validator constructor.
+    """
+    def __init__(self, schema, validator_cls=Validator, **kwds):
+        """Initialization method.
+
+        Parameters
+        ----------
+        schema : dict, cerberus.schema.DefinitionSchema or Validator
+            Schema definition or a validator.
+        validator_cls : type
+            Validator class.
+        **kwds :
+            Keyword arguments passed to the validator constructor.
+        """
+        self.validator_cls = validator_cls
+        self.kwds = kwds
+        schema = copy_schema(schema, shared=True)
+        if not isinstance(schema, DefinitionSchema):
+            schema = validator_cls(schema, **kwds).schema
+        self.schema = schema
+        self._local = local()
+
+    def get(self):
+        """Get validator instance for the current thread."""
+        try:
+            return self._local.validator
+        except AttributeError:
+            validator = self.validator_cls(copy_schema(self.schema, shared=True), **self.kwds)
+            self._local.validator = validator
+            return validator
@@ -1,10 +1,15 @@
 """Command-line interface utilities."""
-# pylint: disable=W0613
+# pylint: disable=W0613,E1101
 from collections.abc import Sequence, Mapping
+import os
+import sys
 import json
+from functools import wraps
+from time import monotonic
 from types import GeneratorType
 import click
-from ..utils import safe_print
+from ..utils import safe_print, iter_unique
+from ..profiling import PROFILE_ENV, PROFILE_MODE_ENV, get_profiler
 from ..serializers import UniversalJSONEncoder
 
 
@@ -24,13 +29,131 @@ def pprint(obj, indent=2):
     else:
         safe_print(obj)
 
-def show_unique(iterator):
-    """Show unique values in an iterator."""
-    shown = []
-    for item in iterator:
-        if item in shown:
-            continue
-        shown.append(item)
+class JSONLinesWriter:
+    """Buffered writer of compact JSON lines.
+
+    It is meant for streaming large numbers of records
+    to other programs or files. Records are serialized to compact
+    JSON and written through a large buffer, which is flushed
+    periodically, so output is not delayed indefinitely.
+
+    Broken pipes (i.e. when output is piped to ``head``)
+    are handled by redirecting the rest of output to ``os.devnull``
+    and raising :py:exc:`BrokenPipeError` only once, so the caller
+    may stop producing records.
+
+    Attributes
+    ----------
+    stream : io.BufferedIOBase
+        Binary output stream.
+    flush_interval : float or None
+        Maximum number of seconds between flushes.
+        Buffer is flushed only when full if `None`.
+    """
+    def __init__(self, stream=None, buffer_size=1 << 16, flush_interval=1.0,
+                 backend=None, json_encoder=UniversalJSONEncoder):
+        """Initialization method.
+
+        Parameters
+        ----------
+        stream : io.BufferedIOBase or None
+            Binary output stream. Standard output is used if `None`.
+        buffer_size : int
+            Buffer size in bytes. Used only for standard output.
+        flush_interval : float or None
+            Maximum number of seconds between flushes.
+        backend : {'json', 'orjson'} or None
+            JSON serialization backend.
+            If `None` then `orjson` is used if it is installed.
+            Both backends produce the same output, i.e. non-string
+            dictionary keys are converted to strings.
+        json_encoder : type
+            JSON encoder class. Its `default` method is used also
+            with the `orjson` backend.
+        """
+        self._owns_stdout = stream is None
+        self._owns_stream = self._owns_stdout
+        if stream is None:
+            sys.stdout.flush()
+            stream = open(sys.stdout.fileno(), 'wb', buffering=buffer_size, closefd=False)
+        self.stream = stream
+        self.flush_interval = flush_interval
+        self._last_flush = monotonic()
+        self.dumps = self._get_dumps(backend, json_encoder)
+
+    @staticmethod
+    def _get_dumps(backend, json_encoder):
+        encoder = json_encoder(separators=(',', ':'), ensure_ascii=False)
+        if backend in (None, 'orjson'):
+            try:
+                import orjson
+            except ImportError:
+                if backend:
+                    raise
+            else:
+                option = orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+                def dumps(obj):
+                    return orjson.dumps(obj, default=encoder.default, option=option)
+                return dumps
+        def dumps(obj):
+            return (encoder.encode(obj)+'\n').encode('utf-8')
+        return dumps
+
+    def write(self, obj):
+        """Write object as a JSON line."""
+        try:
+            self.stream.write(self.dumps(obj))
+            if self.flush_interval is not None \
+            and monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+        except BrokenPipeError:
+            self._handle_broken_pipe()
+            raise
+
+    def flush(self):
+        """Flush the buffer."""
+        self.stream.flush()
+        self._last_flush = monotonic()
+
+    def close(self):
+        """Flush the buffer and detach from the stream."""
+        try:
+            self.flush()
+        except BrokenPipeError:
+            self._handle_broken_pipe()
+        if self._owns_stream:
+            self.stream.close()
+
+    def _handle_broken_pipe(self):
+        if self._owns_stdout:
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            os.close(devnull)
+        self.stream = open(os.devnull, 'wb')
+        self._owns_stream = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def show_unique(iterator, maxsize=None):
+    """Show unique values in an iterator.
+
+    Parameters
+    ----------
+    iterator : iterable
+        Values to show.
+    maxsize : int or None
+        Number of most recently shown values to remember.
+        No limit if `None`.
+
+    See Also
+    --------
+    taukit.utils.iter_unique : Streaming deduplication.
+    """
+    for item in iter_unique(iterator, maxsize=maxsize):
         pprint(item)
 
 def eager_callback(callback):
@@ -55,7 +178,35 @@ def eager_callback(callback):
         ctx.exit()
     return callback_wrapper
 
-def to_console(obj, unique=False, processor=None, **kwds):
+def profile_option(func):
+    """Decorator adding profiling options to a command.
+
+    It has to be applied before (below) ``click.command``.
+    It adds ``--profile`` option with a path prefix of result files
+    and ``--profile-mode`` option (see :py:class:`taukit.profiling.Profiler`).
+    They default to :py:data:`taukit.profiling.PROFILE_ENV`
+    and :py:data:`taukit.profiling.PROFILE_MODE_ENV` environment variables.
+    Results are written also when the command fails.
+    """
+    @click.option('--profile', 'profile_path', default=None, envvar=PROFILE_ENV,
+                  metavar='PATH', help="Profile the command and write results to PATH.*")
+    @click.option('--profile-mode', type=click.Choice(['cprofile', 'sample']),
+                  default='cprofile', envvar=PROFILE_MODE_ENV, show_default=True,
+                  help="CPU profiling mode.")
+    @wraps(func)
+    def wrapper(*args, profile_path=None, profile_mode=None, **kwds):
+        profiler = get_profiler(profile_path, profile_mode)
+        if profiler is None:
+            return func(*args, **kwds)
+        try:
+            with profiler:
+                return func(*args, **kwds)
+        finally:
+            for path in profiler.files.values():
+                click.echo(f"Profiling results written to '{path}'", err=True)
+    return wrapper
+
+def to_console(obj, unique=False, processor=None, maxsize=None, machine=False, **kwds):
     """Print object to the console.
 
     Parameters
@@ -66,18 +217,37 @@ def to_console(obj, unique=False, processor=None, **kwds):
         Iterables within iterables are printed as is.
     unique : bool
         Should duplicated objects be shown only once.
+        Objects are compared after processing.
     processor : func or None
         Optional processing function to call on each object.
+    maxsize : int or None
+        Number of most recently shown objects to remember
+        when showing only unique objects. No limit if `None`.
+    machine : bool
+        Should objects be written as compact JSON lines
+        with :py:class:`JSONLinesWriter` instead of being pretty printed.
+        Output stops quietly when the reading end of a pipe is closed.
     **kwds :
         Keyword arguments passed to the processor function.
     """
     if isinstance(obj, str) or not isinstance(obj, (Sequence, GeneratorType)):
         obj = [obj]
+    if processor:
+        obj = (processor(o, **kwds) for o in obj)
+    if machine:
+        if unique:
+            obj = iter_unique(obj, maxsize=maxsize)
+        with JSONLinesWriter() as writer:
+            try:
+                for o in obj:
+                    writer.write(o)
+            except BrokenPipeError:
+                pass
+        return
     if unique:
-        show_unique(obj)
+        show_unique(obj, maxsize=maxsize)
+        return
     for o in obj:
-        if processor:
-            o = processor(o, **kwds)
         pprint(o)
 
 def do_dry_run(dry, *args):
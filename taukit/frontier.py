@@ -0,0 +1,432 @@
+"""Crawl frontiers shared by many crawling processes.
+
+A frontier is a queue of URLs with a memory of all URLs ever enqueued.
+URLs are leased by workers for a limited time and acknowledged
+when processed, so URLs leased by crashed workers are eventually
+leased again. Enqueuing is idempotent, so many workers may enqueue
+the same URLs (i.e. start URLs or discovered links) without overlap.
+
+:py:class:`SQLiteFrontier` may be shared by processes on one machine.
+:py:class:`HTTPFrontier` talks to a frontier served over HTTP,
+i.e. by :py:class:`FrontierServer`, which is a local stand-in
+for a remote frontier service.
+"""
+import os
+import json
+import socket
+import sqlite3
+import threading
+from contextlib import contextmanager
+from time import time
+from urllib.request import Request, urlopen
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from .utils import make_path, import_python
+
+
+def get_worker_id():
+    """Get identifier of the current process."""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class Frontier:
+    """Frontier interface."""
+
+    def enqueue(self, urls, priority=0):
+        """Enqueue URLs which have not been seen yet.
+
+        Parameters
+        ----------
+        urls : iterable of str or (str, int)
+            URLs or pairs of URLs and their priorities.
+        priority : int
+            Default priority. URLs with higher priorities are leased first.
+
+        Returns
+        -------
+        int
+            Number of enqueued URLs.
+        """
+        raise NotImplementedError
+
+    def lease(self, n=1, owner=None):
+        """Lease URLs.
+
+        Parameters
+        ----------
+        n : int
+            Maximum number of URLs.
+        owner : str or None
+            Identifier of the worker.
+            :py:func:`get_worker_id` is used if ``None``.
+
+        Returns
+        -------
+        list of str
+            Leased URLs.
+        """
+        raise NotImplementedError
+
+    def ack(self, urls, owner=None):
+        """Acknowledge processing of leased URLs.
+
+        URLs which are not leased by the owner (i.e. because
+        the lease expired and the URL was leased by another worker)
+        are ignored.
+
+        Parameters
+        ----------
+        urls : iterable of str
+            Leased URLs.
+        owner : str or None
+            Identifier of the worker.
+            :py:func:`get_worker_id` is used if ``None``.
+
+        Returns
+        -------
+        int
+            Number of acknowledged URLs.
+        """
+        raise NotImplementedError
+
+    def seen(self, url):
+        """Check if URL has ever been enqueued."""
+        raise NotImplementedError
+
+    def pending(self):
+        """Get number of queued and leased URLs."""
+        raise NotImplementedError
+
+    def has_pending(self):
+        """Check if there are any queued or leased URLs."""
+        return self.pending() > 0
+
+    def close(self):
+        """Release resources."""
+
+    def __contains__(self, url):
+        return self.seen(url)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SQLiteFrontier(Frontier):
+    """Frontier stored in a *SQLite* database.
+
+    It may be shared by many processes on one machine.
+    Leasing is done in an immediate transaction, so every URL
+    is leased by one process at a time. Queued URLs and expired leases
+    are looked up with separate indexes, so leasing and counting
+    pending URLs do not scan all URLs ever enqueued.
+    The database schema is created once on initialization
+    and every thread uses its own connection (which is closed
+    by :py:meth:`close` called in that thread).
+
+    Attributes
+    ----------
+    path : str
+        Database file path.
+    lease_ttl : float
+        Lease duration in seconds.
+    key : callable or None
+        Function mapping URLs to keys used for checking
+        if URLs were seen (i.e. URL canonicalization).
+    """
+    _queued, _leased, _done = 0, 1, 2
+
+    def __init__(self, path, lease_ttl=300, key=None, timeout=30):
+        """Initialization method.
+
+        Parameters
+        ----------
+        path : str
+            Database file path.
+        lease_ttl : float
+            Lease duration in seconds.
+        key : callable or str or None
+            Function mapping URLs to keys or its python path.
+            URLs are keys if ``None``.
+        timeout : float
+            Database lock timeout in seconds.
+        """
+        self.path = path
+        self.lease_ttl = lease_ttl
+        self.key = import_python(key) if isinstance(key, str) else key
+        self.timeout = timeout
+        self._local = threading.local()
+        dirpath = os.path.dirname(path)
+        if dirpath:
+            make_path(dirpath, create_dir=True)
+        conn = self.conn
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                state INTEGER NOT NULL,
+                owner TEXT,
+                expires REAL
+            )
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS frontier_queue
+            ON frontier (state, priority DESC)
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS frontier_leases
+            ON frontier (state, expires)
+        """)
+
+    @property
+    def conn(self):
+        """Database connection of the current thread."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _key(self, url):
+        return self.key(url) if self.key else url
+
+    @contextmanager
+    def _transaction(self):
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def enqueue(self, urls, priority=0):
+        rows = []
+        for url in urls:
+            url, p = (url, priority) if isinstance(url, str) else url
+            rows.append((self._key(url), url, p, self._queued))
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO frontier VALUES (?, ?, ?, ?, NULL, NULL)", rows
+            )
+            return conn.total_changes - before
+
+    def lease(self, n=1, owner=None):
+        owner = owner or get_worker_id()
+        now = time()
+        with self._transaction() as conn:
+            queued = conn.execute("""
+                SELECT priority, rowid, key, url FROM frontier
+                WHERE state = ?
+                ORDER BY priority DESC, rowid
+                LIMIT ?
+            """, (self._queued, n)).fetchall()
+            expired = conn.execute("""
+                SELECT priority, rowid, key, url FROM frontier
+                WHERE state = ? AND expires < ?
+                ORDER BY expires
+                LIMIT ?
+            """, (self._leased, now, n)).fetchall()
+            if expired:
+                rows = sorted(queued + expired, key=lambda r: (-r[0], r[1]))[:n]
+            else:
+                rows = queued
+            conn.executemany(
+                "UPDATE frontier SET state = ?, owner = ?, expires = ? WHERE key = ?",
+                [ (self._leased, owner, now + self.lease_ttl, r[2]) for r in rows ]
+            )
+        return [ r[3] for r in rows ]
+
+    def ack(self, urls, owner=None):
+        owner = owner or get_worker_id()
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany("""
+                UPDATE frontier SET state = ?, expires = NULL
+                WHERE key = ? AND state = ? AND owner = ?
+            """, [ (self._done, self._key(url), self._leased, owner) for url in urls ])
+            return conn.total_changes - before
+
+    def seen(self, url):
+        row = self.conn.execute(
+            "SELECT 1 FROM frontier WHERE key = ?", (self._key(url),)
+        ).fetchone()
+        return row is not None
+
+    def pending(self):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM frontier WHERE state < ?", (self._done,)
+        ).fetchone()[0]
+
+    def has_pending(self):
+        return self.conn.execute(
+            "SELECT EXISTS (SELECT 1 FROM frontier WHERE state < ?)", (self._done,)
+        ).fetchone()[0] == 1
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class HTTPFrontier(Frontier):
+    """Client of a frontier served over HTTP.
+
+    Every operation is a ``POST`` request with a JSON body
+    to ``<base_url>/<operation>`` (see :py:class:`FrontierServer`).
+    Calls are blocking.
+
+    Attributes
+    ----------
+    base_url : str
+        Base URL of the frontier service.
+    timeout : float
+        Request timeout in seconds.
+    """
+    def __init__(self, base_url, timeout=10):
+        """Initialization method.
+
+        Parameters
+        ----------
+        base_url : str
+            Base URL of the frontier service.
+        timeout : float
+            Request timeout in seconds.
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def call(self, operation, **kwds):
+        """Call operation of the frontier service."""
+        request = Request(
+            f'{self.base_url}/{operation}',
+            data=json.dumps(kwds).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}
+        )
+        with urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    def enqueue(self, urls, priority=0):
+        return self.call('enqueue', urls=list(urls), priority=priority)['result']
+
+    def lease(self, n=1, owner=None):
+        return self.call('lease', n=n, owner=owner or get_worker_id())['result']
+
+    def ack(self, urls, owner=None):
+        return self.call('ack', urls=list(urls), owner=owner or get_worker_id())['result']
+
+    def seen(self, url):
+        return self.call('seen', url=url)['result']
+
+    def pending(self):
+        return self.call('pending')['result']
+
+    def has_pending(self):
+        return self.call('has_pending')['result']
+
+
+class _FrontierHandler(BaseHTTPRequestHandler):
+
+    operations = ('enqueue', 'lease', 'ack', 'seen', 'pending', 'has_pending')
+
+    def do_POST(self):
+        operation = self.path.strip('/')
+        if operation not in self.operations:
+            self.send_error(404)
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            kwds = json.loads(self.rfile.read(length) or b'{}')
+            result = getattr(self.server.frontier, operation)(**kwds)
+        except (TypeError, ValueError) as exc:
+            self.send_error(400, str(exc))
+            return
+        except Exception as exc:    # pylint: disable=broad-except
+            self.send_error(500, str(exc))
+            return
+        data = json.dumps({'result': result}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):    # pylint: disable=redefined-builtin
+        pass
+
+
+class FrontierServer:
+    """HTTP server exposing a frontier.
+
+    It is a local stand-in for a remote frontier service
+    to be used with :py:class:`HTTPFrontier`.
+    Requests are handled one at a time in the serving thread,
+    so all calls of the frontier share one connection
+    (which is closed when the server stops).
+
+    Attributes
+    ----------
+    frontier : Frontier
+        Served frontier.
+    server : http.server.HTTPServer
+        HTTP server.
+    """
+    def __init__(self, frontier, host='127.0.0.1', port=0):
+        """Initialization method.
+
+        Parameters
+        ----------
+        frontier : Frontier
+            Served frontier.
+        host : str
+            Host name.
+        port : int
+            Port. Any free port is used if ``0``.
+        """
+        self.frontier = frontier
+        self.server = HTTPServer((host, port), _FrontierHandler)
+        self.server.frontier = frontier
+        self._thread = None
+
+    @property
+    def url(self):
+        """Base URL of the server."""
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def serve_forever(self):
+        """Serve requests until :py:meth:`stop` is called.
+
+        Resources of the frontier used by the serving thread
+        are released afterwards.
+        """
+        try:
+            self.server.serve_forever()
+        finally:
+            self.frontier.close()
+
+    def start(self):
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving requests."""
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,382 @@
+"""Lightweight in-process metrics."""
+import os
+import json
+from bisect import bisect_left
+from time import monotonic
+
+
+def _escape_label(value):
+    """Escape *Prometheus* label value."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    """Histogram with geometrically growing buckets.
+
+    It is meant for recording latencies (in seconds) on hot paths,
+    so adding a value costs only a binary search over bucket bounds.
+    Quantiles are approximated by upper bounds of buckets
+    (clipped to the observed minimum and maximum).
+
+    Attributes
+    ----------
+    bounds : tuple of float
+        Upper bounds of buckets. The last bucket is unbounded.
+    counts : list of int
+        Number of values in buckets.
+    count : int
+        Number of values.
+    sum : float
+        Sum of values.
+    min : float or None
+        Minimum value.
+    max : float or None
+        Maximum value.
+    """
+    def __init__(self, start=1e-6, factor=2, n_buckets=28):
+        """Initialization method.
+
+        Parameters
+        ----------
+        start : float
+            Upper bound of the first bucket.
+            Default is one microsecond.
+        factor : float
+            Ratio of consecutive bucket bounds.
+        n_buckets : int
+            Number of bounded buckets.
+            Default values cover latencies up to about 2 minutes.
+        """
+        self.bounds = tuple(start * factor**i for i in range(n_buckets))
+        self.counts = [0] * (n_buckets + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def mean(self):
+        """Mean value or ``None`` if empty."""
+        return self.sum / self.count if self.count else None
+
+    def add(self, value):
+        """Add value."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Merge other histogram with the same buckets into this one."""
+        if other.bounds != self.bounds:
+            raise ValueError("histograms have different buckets")
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.sum += other.sum
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """Get approximate quantile or ``None`` if empty.
+
+        Parameters
+        ----------
+        q : float
+            Quantile between 0 and 1.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            cumulative += n
+            if n and cumulative >= rank:
+                bound = self.bounds[i] if i < len(self.bounds) else self.max
+                return max(self.min, min(bound, self.max))
+        return self.max
+
+    def as_dict(self, quantiles=(.5, .9, .99)):
+        """Get summary dictionary.
+
+        Parameters
+        ----------
+        quantiles : sequence of float
+            Quantiles to include as ``p<percent>`` keys.
+        """
+        summary = {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.mean,
+            'min': self.min,
+            'max': self.max
+        }
+        for q in quantiles:
+            summary[f'p{q*100:g}'] = self.quantile(q)
+        return summary
+
+
+class StageTimer:
+    """Per-stage latency histograms grouped by arbitrary keys.
+
+    Attributes
+    ----------
+    histograms : dict
+        Mapping from ``(group, stage)`` to :py:class:`Histogram`.
+    hist_kwds : dict
+        Keyword arguments passed to :py:class:`Histogram`.
+    """
+    def __init__(self, **hist_kwds):
+        """Initialization method.
+
+        Parameters
+        ----------
+        **hist_kwds :
+            Keyword arguments passed to :py:class:`Histogram`.
+        """
+        self.histograms = {}
+        self.hist_kwds = hist_kwds
+
+    def get(self, group, stage):
+        """Get (and create if needed) a histogram of a stage."""
+        key = (group, stage)
+        try:
+            return self.histograms[key]
+        except KeyError:
+            hist = self.histograms[key] = Histogram(**self.hist_kwds)
+            return hist
+
+    def record(self, group, stages):
+        """Record latencies of stages.
+
+        Parameters
+        ----------
+        group : str
+            Group name (i.e. spider or item loader class name).
+        stages : iterable of (str, float)
+            Pairs of stage names and latencies.
+        """
+        for stage, value in stages:
+            self.get(group, stage).add(value)
+
+    def as_dict(self, **kwds):
+        """Get nested summary dictionary.
+
+        Parameters
+        ----------
+        **kwds :
+            Passed to :py:meth:`Histogram.as_dict`.
+        """
+        summary = {}
+        for (group, stage), hist in self.histograms.items():
+            summary.setdefault(group, {})[stage] = hist.as_dict(**kwds)
+        return summary
+
+    def publish(self, stats, prefix='timing', **kwds):
+        """Publish summary to a stats collector.
+
+        Values are set under ``<prefix>/<group>/<stage>/<key>`` keys.
+
+        Parameters
+        ----------
+        stats : scrapy.statscollectors.StatsCollector
+            Stats collector or any object with ``set_value`` method.
+        prefix : str
+            Stats keys prefix.
+        **kwds :
+            Passed to :py:meth:`Histogram.as_dict`.
+        """
+        for group, stages in self.as_dict(**kwds).items():
+            for stage, summary in stages.items():
+                for key, value in summary.items():
+                    stats.set_value(f'{prefix}/{group}/{stage}/{key}', value)
+
+
+class PersisterMetrics:
+    """Metrics of a persister.
+
+    Tracks persisted items, encoded bytes and batches, time spent
+    on encoding versus writing, latency distribution of batch flushes
+    and queue depth (number of items waiting to be persisted
+    in buffered modes, i.e. :py:class:`taukit.webscraping.pipelines.PersisterPipeline`).
+
+    Metrics may be dumped periodically to a file in JSON
+    or *Prometheus* text exposition format (i.e. for the node exporter
+    textfile collector). Files are replaced atomically.
+
+    Attributes
+    ----------
+    items : int
+        Number of persisted items.
+    bytes : int
+        Number of persisted bytes.
+    batches : int
+        Number of persisted batches.
+    encode_time : float
+        Total time (in seconds) spent on encoding items.
+    write_time : float
+        Total time (in seconds) spent on writing data.
+    flush_latency : Histogram
+        Latencies of batches (encoding and writing).
+    queue_depth : int
+        Current queue depth.
+    max_queue_depth : int
+        Maximum observed queue depth.
+    dump_path : str or None
+        Path of the dump file.
+    dump_format : str
+        Dump format. Either ``'json'`` or ``'prometheus'``.
+    dump_interval : float
+        Minimum time in seconds between dumps.
+    labels : dict
+        Labels of *Prometheus* metrics.
+    """
+    def __init__(self, dump_path=None, dump_format=None, dump_interval=60, labels=None):
+        """Initialization method.
+
+        Parameters
+        ----------
+        dump_path : str or None
+            Path of the dump file. Metrics are not dumped if ``None``.
+        dump_format : str or None
+            Dump format. Either ``'json'`` or ``'prometheus'``.
+            If ``None`` then it is ``'prometheus'`` for paths
+            with ``.prom`` extension and ``'json'`` otherwise.
+        dump_interval : float
+            Minimum time in seconds between dumps.
+        labels : dict or None
+            Labels of *Prometheus* metrics.
+        """
+        if dump_format is None:
+            dump_format = 'prometheus' \
+                if dump_path and dump_path.endswith('.prom') else 'json'
+        if dump_format not in ('json', 'prometheus'):
+            raise ValueError(f"unknown dump format '{dump_format}'")
+        self.items = 0
+        self.bytes = 0
+        self.batches = 0
+        self.encode_time = 0.0
+        self.write_time = 0.0
+        self.flush_latency = Histogram()
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.dump_path = dump_path
+        self.dump_format = dump_format
+        self.dump_interval = dump_interval
+        self.labels = labels or {}
+        self._last_dump = monotonic()
+
+    def record_batch(self, items, nbytes, encode_time, write_time):
+        """Record a persisted batch.
+
+        Parameters
+        ----------
+        items : int
+            Number of items.
+        nbytes : int
+            Number of bytes.
+        encode_time : float
+            Encoding time in seconds.
+        write_time : float
+            Writing time in seconds.
+        """
+        self.items += items
+        self.bytes += nbytes
+        self.batches += 1
+        self.encode_time += encode_time
+        self.write_time += write_time
+        self.flush_latency.add(encode_time + write_time)
+        self.maybe_dump()
+
+    def set_queue_depth(self, depth):
+        """Set current queue depth."""
+        self.queue_depth = depth
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def as_dict(self):
+        """Get metrics as a dictionary."""
+        return {
+            'items': self.items,
+            'bytes': self.bytes,
+            'batches': self.batches,
+            'encode_time': self.encode_time,
+            'write_time': self.write_time,
+            'flush_latency': self.flush_latency.as_dict(),
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth
+        }
+
+    def to_prometheus(self, prefix='taukit_persister'):
+        """Get metrics in *Prometheus* text exposition format.
+
+        Parameters
+        ----------
+        prefix : str
+            Metric names prefix.
+        """
+        def labels(**extra):
+            pairs = { **self.labels, **extra }
+            if not pairs:
+                return ''
+            return '{'+','.join(f'{k}="{_escape_label(v)}"' for k, v in pairs.items())+'}'
+        lines = []
+        def metric(name, kind, value, help_):
+            lines.append(f'# HELP {prefix}_{name} {help_}')
+            lines.append(f'# TYPE {prefix}_{name} {kind}')
+            lines.append(f'{prefix}_{name}{labels()} {value}')
+        metric('items_total', 'counter', self.items, "Persisted items.")
+        metric('bytes_total', 'counter', self.bytes, "Persisted bytes.")
+        metric('batches_total', 'counter', self.batches, "Persisted batches.")
+        metric('encode_seconds_total', 'counter', self.encode_time,
+               "Time spent on encoding items.")
+        metric('write_seconds_total', 'counter', self.write_time,
+               "Time spent on writing data.")
+        metric('queue_depth', 'gauge', self.queue_depth,
+               "Items waiting to be persisted.")
+        metric('queue_depth_max', 'gauge', self.max_queue_depth,
+               "Maximum number of items waiting to be persisted.")
+        hist = self.flush_latency
+        name = f'{prefix}_flush_seconds'
+        lines.append(f'# HELP {name} Latency of persisting batches.')
+        lines.append(f'# TYPE {name} histogram')
+        cumulative = 0
+        for bound, n in zip(hist.bounds, hist.counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{labels(le=f"{bound:g}")} {cumulative}')
+        lines.append(f'{name}_bucket{labels(le="+Inf")} {hist.count}')
+        lines.append(f'{name}_sum{labels()} {hist.sum}')
+        lines.append(f'{name}_count{labels()} {hist.count}')
+        return '\n'.join(lines)+'\n'
+
+    def dump(self, path=None):
+        """Dump metrics to a file.
+
+        Parameters
+        ----------
+        path : str or None
+            File path. Use ``dump_path`` if ``None``.
+        """
+        path = path or self.dump_path
+        if self.dump_format == 'prometheus':
+            data = self.to_prometheus()
+        else:
+            data = json.dumps(self.as_dict(), indent=2)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._last_dump = monotonic()
+
+    def maybe_dump(self):
+        """Dump metrics if ``dump_path`` is defined and ``dump_interval`` passed."""
+        if self.dump_path and monotonic() - self._last_dump >= self.dump_interval:
+            self.dump()
@@ -1,15 +1,27 @@
 """Persister classes."""
 # pylint: disable=arguments-differ
 from logging import getLogger
+import io
+import os
 import json
-from .utils import safe_print, make_path, make_filepath
+import zlib
+import struct
+import sqlite3
+import hashlib
+from string import Formatter
+from collections.abc import Mapping
+from time import perf_counter, time
+from .metrics import PersisterMetrics
+from .utils import safe_print, make_path, make_filepath, find_filepath, clear_path_cache
 from .serializers import JSONEncoder
 
+_length_prefix = struct.Struct('>I')
+
 
 class Persister:
     """Generic persister class."""
 
-    def __init__(self, batch_size=None, logger=None, item_name='item'):
+    def __init__(self, batch_size=None, logger=None, item_name='item', metrics=None):
         """Initialization method.
 
         Parameters
@@ -20,11 +32,16 @@ class Persister:
             Logger object. Module-level logger is used if ``None``.
         item_name : str
             Item name.
+        metrics : taukit.metrics.PersisterMetrics or dict or None
+            Metrics object or keyword arguments used to create it.
         """
         self.batch_size = batch_size
         self.logger = logger if logger else getLogger(__name__)
         self.counter = 0
         self.item_name = item_name
+        if not isinstance(metrics, PersisterMetrics):
+            metrics = PersisterMetrics(**(metrics or {}))
+        self.metrics = metrics
 
     def persist(self, items):
         """Persist an object."""
@@ -65,7 +82,7 @@ class Persister:
 class FilePersister(Persister):
     """Generic file persister class."""
 
-    def __init__(self, filename, dirpath, logger=None, item_name='item'):
+    def __init__(self, filename, dirpath, logger=None, item_name='item', metrics=None):
         """Initialization method.
 
         Parameters
@@ -75,7 +92,7 @@ class FilePersister(Persister):
         dirpath : str
             Persistence directory path.
         """
-        super().__init__(logger=logger, item_name=item_name)
+        super().__init__(logger=logger, item_name=item_name, metrics=metrics)
         self.filename = filename
         self.dirpath = dirpath
         self.json_serializer = JSONEncoder
@@ -83,14 +100,49 @@ class FilePersister(Persister):
 
     @property
     def filepath(self):
-        """Filepath getter."""
+        """Path of the file to write to.
+
+        If the file name has a counter placeholder `{n}`, then
+        a new file with the first free counter value is reserved
+        (created atomically) on the first access. Otherwise
+        data is appended to the file with the given name.
+        """
         if not self._filepath:
-            self._filepath = make_path(
-                make_filepath(self.filename, self.dirpath, inc_if_taken=True),
-                create_dir=True
-            )
+            create = 'n' in { f for _, f, _, _ in Formatter().parse(self.filename) if f }
+            make_path(self.dirpath, self.filename, create_dir=True)
+            try:
+                self._filepath = make_filepath(self.filename, self.dirpath,
+                                               inc_if_taken=True, create=create)
+            except FileNotFoundError:
+                clear_path_cache(self.dirpath)
+                make_path(self.dirpath, self.filename, create_dir=True)
+                self._filepath = make_filepath(self.filename, self.dirpath,
+                                               inc_if_taken=True, create=create)
         return self._filepath
 
+    def get_load_path(self, filepath=None):
+        """Get path of an existing file to read from.
+
+        Nothing is created, so reading never reserves new files.
+
+        Parameters
+        ----------
+        filepath : str or None
+            File path. If ``None``, then the file written by this persister
+            is used or the last existing file matching the file name
+            (see :py:func:`taukit.utils.find_filepath`).
+
+        Raises
+        ------
+        FileNotFoundError
+            If there is no file to read from.
+        """
+        if filepath is None:
+            filepath = self._filepath or find_filepath(self.filename, self.dirpath)
+        if filepath is None:
+            raise FileNotFoundError(f"no '{self.filename}' file in '{self.dirpath}'")
+        return filepath
+
     def load(self, filepath=None):
         """Load data saved to a file."""
         raise NotImplementedError
@@ -100,7 +152,7 @@ class JSONLinesPersister(FilePersister):
     """JSON lines based file persister."""
 
     def __init__(self, filename, dirpath, json_encoder=JSONEncoder,
-                 json_decoder=None, logger=None, item_name='item'):
+                 json_decoder=None, logger=None, item_name='item', metrics=None):
         """Initialization method.
 
         Parameters
@@ -118,18 +170,571 @@ class JSONLinesPersister(FilePersister):
             filename=filename,
             dirpath=dirpath,
             logger=logger,
-            item_name=item_name
+            item_name=item_name,
+            metrics=metrics
         )
         self.json_encoder = json_encoder
         self.json_decoder = json_decoder
 
     def persist(self, items):
-        for item in items:
-            json.dumps(item, cls=self.json_serializer)
+        """Append items to the file.
+
+        Returns
+        -------
+        int
+            Number of bytes written.
+        """
+        t0 = perf_counter()
+        lines = [ json.dumps(item, cls=self.json_encoder)+'\n' for item in items ]
+        data = ''.join(lines).encode('utf-8')
+        t1 = perf_counter()
+        with open(self.filepath, 'ab') as f:
+            f.write(data)
+        self.metrics.record_batch(len(lines), len(data), t1 - t0, perf_counter() - t1)
+        return len(data)
 
     def load(self, filepath=None):
-        if filepath is None:
-            filepath = self.filepath
-        with open(filepath, 'r') as f:
+        filepath = self.get_load_path(filepath)
+        with open(filepath, 'r', encoding='utf-8') as f:
             for line in f:
-                yield json.loads(line.strip, cls=self.json_decoder)
+                yield json.loads(line.strip(), cls=self.json_decoder)
+
+
+class ResponseArchivePersister(FilePersister):
+    """Persister of raw HTTP responses.
+
+    Responses (URL, status, headers and body) are stored as compressed
+    records in a :py:class:`PackFile`, so they can be read sequentially
+    or accessed randomly by URL. This allows for re-extracting items
+    offline (see :py:func:`taukit.webscraping.utils.load_archived_items`)
+    without crawling again.
+    """
+
+    def __init__(self, filename, dirpath, compresslevel=6, logger=None,
+                 item_name='response', metrics=None):
+        """Initialization method.
+
+        Parameters
+        ----------
+        filename : str
+            Persistence file name.
+        dirpath : str
+            Persistence directory path.
+        compresslevel : int
+            Compression level.
+        """
+        super().__init__(
+            filename=filename,
+            dirpath=dirpath,
+            logger=logger,
+            item_name=item_name,
+            metrics=metrics
+        )
+        self.compresslevel = compresslevel
+        self._pack = None
+
+    @property
+    def pack(self):
+        """Pack file getter.
+
+        Pack file opened read-only (i.e. by :py:meth:`get`)
+        is reopened for writing.
+        """
+        if self._pack is None or self._pack.readonly:
+            self.close()
+            self._pack = PackFile(self.filepath, compresslevel=self.compresslevel).open()
+        return self._pack
+
+    def persist(self, responses):
+        """Persist responses.
+
+        Parameters
+        ----------
+        responses : iterable
+            Response objects (i.e. :py:class:`scrapy.http.Response`)
+            or mappings with `url`, `status`, `headers` and `body` keys
+            and optional `timestamp` key.
+
+        Returns
+        -------
+        int
+            Number of bytes written.
+        """
+        pack = self.pack
+        start = pack.size
+        n = 0
+        encode_time = 0.0
+        write_time = 0.0
+        for response in responses:
+            t0 = perf_counter()
+            if not isinstance(response, Mapping):
+                response = {
+                    'url': response.url,
+                    'status': response.status,
+                    'headers': {
+                        k.decode('latin-1'): [ v.decode('latin-1') for v in vs ]
+                        for k, vs in response.headers.items()
+                    },
+                    'body': response.body
+                }
+            data = dump_response_record(
+                response['url'],
+                response['status'],
+                response['headers'],
+                response['body'],
+                timestamp=response.get('timestamp')
+            )
+            blob = pack.compress(data)
+            t1 = perf_counter()
+            pack.append_compressed(response['url'], blob)
+            encode_time += t1 - t0
+            write_time += perf_counter() - t1
+            n += 1
+        t0 = perf_counter()
+        pack.flush()
+        write_time += perf_counter() - t0
+        nbytes = pack.size - start
+        self.metrics.record_batch(n, nbytes, encode_time, write_time)
+        return nbytes
+
+    def get(self, url):
+        """Get the last persisted response with a given URL.
+
+        Returns
+        -------
+        dict or None
+            Response record (see :py:func:`load_response_record`)
+            or ``None`` if there is no such response or no archive.
+        """
+        if self._pack is None:
+            try:
+                self._pack = PackFile(self.get_load_path()).open(readonly=True)
+            except FileNotFoundError:
+                return None
+        data = self._pack.get(url)
+        if data is None:
+            return None
+        return load_response_record(data)
+
+    def load(self, filepath=None):
+        """Load response records in the order of persisting.
+
+        Archives are opened read-only and existing archives are found
+        with :py:meth:`get_load_path`, so loading never writes to disk.
+        """
+        if filepath is None and self._pack is not None:
+            pack = self._pack
+        else:
+            pack = PackFile(self.get_load_path(filepath)).open(readonly=True)
+        try:
+            for data in pack:
+                yield load_response_record(data)
+        finally:
+            if pack is not self._pack:
+                pack.close()
+
+    def close(self):
+        """Close the archive."""
+        if self._pack is not None:
+            self._pack.close()
+            self._pack = None
+
+
+class PackFile:
+    """Append-only file of compressed records with an offset index.
+
+    Records are stored in the data file one after another
+    as zlib compressed payloads prefixed with their length.
+    Every record is indexed by a key and the index
+    is kept in a separate file (data file path with ``.idx`` suffix)
+    as fixed-size entries with a key digest and a record offset.
+    Index is loaded into memory when the file is opened and later records
+    with the same key shadow earlier ones. Truncated entries at the end
+    of the index and entries pointing past the end of the data file
+    (i.e. after a crash) are dropped.
+
+    Attributes
+    ----------
+    path : str
+        Data file path.
+    index_path : str
+        Index file path.
+    index : dict
+        Mapping from key digests to record offsets.
+    compresslevel : int
+        Compression level.
+    readonly : bool
+        Is the file opened read-only.
+    """
+    _entry = struct.Struct('>QQ')
+
+    def __init__(self, path, compresslevel=6):
+        """Initialization method.
+
+        Parameters
+        ----------
+        path : str
+            Data file path.
+        compresslevel : int
+            Compression level.
+        """
+        self.path = path
+        self.index_path = path+'.idx'
+        self.compresslevel = compresslevel
+        self.index = {}
+        self._data = None
+        self._idx = None
+        self._reader = None
+        self._dirty = False
+        self.readonly = False
+
+    @staticmethod
+    def digest(key):
+        """Get key digest."""
+        if isinstance(key, str):
+            key = key.encode('utf-8')
+        return int.from_bytes(hashlib.md5(key).digest()[:8], 'big')
+
+    def open(self, readonly=False):
+        """Open data and index files and load the index.
+
+        Parameters
+        ----------
+        readonly : bool
+            Should files be opened only for reading.
+            Nothing is created or truncated then
+            and records can not be appended.
+        """
+        self.readonly = readonly
+        if not readonly:
+            make_path(self.path, create_dir=True)
+            self._data = open(self.path, 'ab')
+            self._data.seek(0, os.SEEK_END)
+        self._reader = open(self.path, 'rb')
+        try:
+            with open(self.index_path, 'rb' if readonly else 'ab+') as f:
+                f.seek(0)
+                index = f.read()
+        except FileNotFoundError:
+            index = b''
+        size = self._entry.size
+        end = self._valid_index_end(index[:len(index) - len(index) % size])
+        self.index = dict(self._entry.iter_unpack(index[:end]))
+        if not readonly:
+            self._idx = open(self.index_path, 'ab')
+            if end != len(index):
+                self._idx.truncate(end)
+        return self
+
+    def _valid_index_end(self, index):
+        """Get length of the index without entries of unwritten records.
+
+        Records are appended, so offsets grow and only entries
+        at the end of the index may point past the end of the data.
+        """
+        data_size = self._reader.seek(0, os.SEEK_END)
+        size = self._entry.size
+        end = len(index)
+        while end:
+            _, offset = self._entry.unpack_from(index, end - size)
+            self._reader.seek(offset)
+            header = self._reader.read(_length_prefix.size)
+            if len(header) == _length_prefix.size \
+            and offset + len(header) + _length_prefix.unpack(header)[0] <= data_size:
+                break
+            end -= size
+        return end
+
+    def close(self):
+        """Flush and close files."""
+        if self._data is not None:
+            self.flush()
+            self._data.close()
+            self._idx.close()
+        if self._reader is not None:
+            self._reader.close()
+        self._data = self._idx = self._reader = None
+
+    def flush(self):
+        """Flush data and index files.
+
+        Data is flushed before the index, but the index buffer may also
+        be written when it is full, so after a crash the index may point
+        to records that were not written. Such entries are dropped
+        by :py:meth:`open`.
+        """
+        self._data.flush()
+        self._idx.flush()
+        self._dirty = False
+
+    def append(self, key, payload):
+        """Append a record.
+
+        Parameters
+        ----------
+        key : str or bytes
+            Record key.
+        payload : bytes
+            Record payload.
+
+        Returns
+        -------
+        int
+            Record offset.
+        """
+        return self.append_compressed(key, self.compress(payload))
+
+    def compress(self, payload):
+        """Compress record payload."""
+        return zlib.compress(payload, self.compresslevel)
+
+    def append_compressed(self, key, blob):
+        """Append a record with an already compressed payload.
+
+        Parameters
+        ----------
+        key : str or bytes
+            Record key.
+        blob : bytes
+            Payload compressed with :py:meth:`compress`.
+
+        Returns
+        -------
+        int
+            Record offset.
+        """
+        if self.readonly:
+            raise io.UnsupportedOperation("pack file is opened read-only")
+        offset = self._data.tell()
+        self._data.write(_length_prefix.pack(len(blob)))
+        self._data.write(blob)
+        digest = self.digest(key)
+        self._idx.write(self._entry.pack(digest, offset))
+        self.index[digest] = offset
+        self._dirty = True
+        return offset
+
+    @property
+    def size(self):
+        """Size of the data file in bytes."""
+        if self._data is None:
+            return os.fstat(self._reader.fileno()).st_size
+        return self._data.tell()
+
+    def read(self, offset):
+        """Read record payload at a given offset."""
+        if self._dirty:
+            self.flush()
+        self._reader.seek(offset)
+        size, = _length_prefix.unpack(self._reader.read(_length_prefix.size))
+        return zlib.decompress(self._reader.read(size))
+
+    def get(self, key, default=None):
+        """Get payload of the last record with a given key."""
+        offset = self.index.get(self.digest(key))
+        if offset is None:
+            return default
+        return self.read(offset)
+
+    def __contains__(self, key):
+        return self.digest(key) in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        """Iterate over payloads of all records in the order of writing.
+
+        Truncated records at the end of the file are ignored.
+        """
+        if self._dirty:
+            self.flush()
+        with open(self.path, 'rb') as f:
+            while True:
+                header = f.read(_length_prefix.size)
+                if len(header) < _length_prefix.size:
+                    break
+                size, = _length_prefix.unpack(header)
+                blob = f.read(size)
+                if len(blob) < size:
+                    break
+                yield zlib.decompress(blob)
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CrawlIndex:
+    """Index of crawled pages for incremental crawling.
+
+    It is a *SQLite* database mapping (canonical) URLs to validators
+    returned by servers (``ETag`` and ``Last-Modified`` headers)
+    and digests of response bodies from previous crawls.
+    Changes are committed in batches and when the index is closed.
+
+    Attributes
+    ----------
+    path : str
+        Database file path.
+    commit_every : int
+        Number of updates between commits.
+    """
+    def __init__(self, path, commit_every=100):
+        """Initialization method.
+
+        Parameters
+        ----------
+        path : str
+            Database file path.
+        commit_every : int
+            Number of updates between commits.
+        """
+        self.path = path
+        self.commit_every = commit_every
+        self._conn = None
+        self._pending = 0
+
+    @staticmethod
+    def digest(body):
+        """Get body digest."""
+        return hashlib.sha1(body).hexdigest()
+
+    @property
+    def conn(self):
+        """Database connection getter."""
+        if self._conn is None:
+            dirpath = os.path.dirname(self.path)
+            if dirpath:
+                make_path(dirpath, create_dir=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    digest TEXT,
+                    updated REAL
+                )
+            """)
+        return self._conn
+
+    def get(self, url):
+        """Get record of an URL.
+
+        Returns
+        -------
+        dict or None
+            Record with `etag`, `last_modified`, `digest`
+            and `updated` keys or ``None`` if URL is not indexed.
+        """
+        row = self.conn.execute(
+            "SELECT etag, last_modified, digest, updated FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('etag', 'last_modified', 'digest', 'updated'), row))
+
+    def update(self, url, etag=None, last_modified=None, digest=None):
+        """Insert or replace record of an URL."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+            (url, etag, last_modified, digest, time())
+        )
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.commit()
+
+    def conditional_headers(self, url):
+        """Get conditional request headers for an URL.
+
+        Returns
+        -------
+        dict
+            ``If-None-Match`` and/or ``If-Modified-Since`` headers
+            if validators of the URL are known.
+        """
+        record = self.get(url)
+        headers = {}
+        if record:
+            if record['etag']:
+                headers['If-None-Match'] = record['etag']
+            if record['last_modified']:
+                headers['If-Modified-Since'] = record['last_modified']
+        return headers
+
+    def commit(self):
+        """Commit pending changes."""
+        if self._conn is not None:
+            self._conn.commit()
+        self._pending = 0
+
+    def close(self):
+        """Commit pending changes and close the database."""
+        if self._conn is not None:
+            self.commit()
+            self._conn.close()
+            self._conn = None
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def __contains__(self, url):
+        return self.get(url) is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def dump_response_record(url, status, headers, body, timestamp=None):
+    """Serialize raw HTTP response.
+
+    Parameters
+    ----------
+    url : str
+        Response URL.
+    status : int
+        HTTP status.
+    headers : dict
+        Mapping from header names to lists of values (str).
+    body : bytes
+        Response body.
+    timestamp : float or None
+        Optional time of fetching the response.
+
+    Returns
+    -------
+    bytes
+        Length-prefixed JSON with metadata followed by the body.
+    """
+    meta = json.dumps({
+        'url': url,
+        'status': status,
+        'headers': headers,
+        'timestamp': timestamp
+    }).encode('utf-8')
+    return _length_prefix.pack(len(meta)) + meta + body
+
+def load_response_record(data):
+    """Deserialize raw HTTP response.
+
+    Parameters
+    ----------
+    data : bytes
+        Data created by :py:func:`dump_response_record`.
+
+    Returns
+    -------
+    dict
+        Response metadata with the body under `body` key.
+    """
+    size = _length_prefix.size
+    length, = _length_prefix.unpack(data[:size])
+    record = json.loads(data[size:size+length].decode('utf-8'))
+    record['body'] = data[size+length:]
+    return record
@@ -0,0 +1,246 @@
+"""CPU and memory profiling of commands and crawls.
+
+Profiling is enabled by :py:data:`PROFILE_ENV` environment variable,
+``--profile`` option of CLI commands (see :py:func:`taukit.cli.utils.profile_option`)
+or ``TAUKIT_PROFILE`` setting of scrapy projects
+(see :py:class:`taukit.webscraping.extensions.ProfilerExtension`).
+Results may be inspected with :py:func:`open_profile`.
+"""
+import os
+import signal
+import pstats
+import cProfile
+import tracemalloc
+from collections import Counter
+from .utils import make_path
+
+PROFILE_ENV = 'TAUKIT_PROFILE'
+PROFILE_MODE_ENV = 'TAUKIT_PROFILE_MODE'
+
+_modes = ('cprofile', 'sample')
+_exclude = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>')
+)
+
+
+class Profiler:
+    """CPU and memory profiler.
+
+    CPU time is profiled with :py:mod:`cProfile` or with a sampling
+    profiler, which records the main thread stack on ``SIGPROF``
+    (Unix only) and is much cheaper for long runs.
+    Memory allocations are traced with :py:mod:`tracemalloc`.
+
+    Results are written to files with names starting with ``path``:
+
+    ``<path>.pstats``
+        :py:mod:`cProfile` stats (``cprofile`` mode).
+    ``<path>.samples.txt``
+        Sampled stacks in collapsed format (``sample`` mode).
+        It may be rendered with *FlameGraph* or *speedscope*.
+    ``<path>.tracemalloc``
+        Memory snapshot.
+    ``<path>.alloc.txt``
+        Top allocations by source line.
+
+    Attributes
+    ----------
+    path : str
+        Path prefix of result files.
+    mode : {'cprofile', 'sample'} or None
+        CPU profiling mode. CPU is not profiled if ``None``.
+    memory : bool
+        Should memory allocations be traced.
+    top : int
+        Number of top allocations in the report.
+    interval : float
+        Sampling interval in seconds.
+    files : dict
+        Paths of written files.
+    samples : collections.Counter
+        Sampled stacks.
+    """
+    def __init__(self, path, mode='cprofile', memory=True, top=30, interval=.005, nframes=1):
+        """Initialization method.
+
+        Parameters
+        ----------
+        path : str
+            Path prefix of result files.
+        mode : {'cprofile', 'sample'} or None
+            CPU profiling mode. CPU is not profiled if ``None``.
+        memory : bool
+            Should memory allocations be traced.
+        top : int
+            Number of top allocations in the report.
+        interval : float
+            Sampling interval in seconds.
+        nframes : int
+            Number of frames stored for traced allocations.
+        """
+        if mode not in (*_modes, None):
+            raise ValueError(f"unknown profiling mode '{mode}'")
+        self.path = path
+        self.mode = mode
+        self.memory = memory
+        self.top = top
+        self.interval = interval
+        self.nframes = nframes
+        self.files = {}
+        self.samples = Counter()
+        self._profile = None
+        self._handler = None
+        self._tracing = False
+
+    def start(self):
+        """Start profiling."""
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(self.nframes)
+            self._tracing = True
+        if self.mode == 'cprofile':
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif self.mode == 'sample':
+            self._handler = signal.signal(signal.SIGPROF, self._sample)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        return self
+
+    def stop(self):
+        """Stop profiling and write results.
+
+        Returns
+        -------
+        dict
+            Paths of written files.
+        """
+        if self._profile is not None:
+            self._profile.disable()
+        elif self._handler is not None:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, self._handler)
+        snapshot = None
+        if self.memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces(_exclude)
+            current, peak = tracemalloc.get_traced_memory()
+            if self._tracing:
+                tracemalloc.stop()
+                self._tracing = False
+        dirpath = os.path.dirname(self.path)
+        if dirpath:
+            make_path(dirpath, create_dir=True)
+        if self._profile is not None:
+            self.files['pstats'] = self.path+'.pstats'
+            self._profile.dump_stats(self.files['pstats'])
+            self._profile = None
+        elif self._handler is not None:
+            self.files['samples'] = self.path+'.samples.txt'
+            with open(self.files['samples'], 'w') as f:
+                for stack, n in self.samples.most_common():
+                    f.write(f'{stack} {n}\n')
+            self._handler = None
+        if snapshot is not None:
+            self.files['tracemalloc'] = self.path+'.tracemalloc'
+            snapshot.dump(self.files['tracemalloc'])
+            self.files['alloc'] = self.path+'.alloc.txt'
+            with open(self.files['alloc'], 'w') as f:
+                f.write(f"Current traced memory: {current/1024:.1f} KiB\n")
+                f.write(f"Peak traced memory: {peak/1024:.1f} KiB\n\n")
+                for stat in snapshot.statistics('lineno')[:self.top]:
+                    f.write(f"{stat}\n")
+        return self.files
+
+    def _sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})')
+            frame = frame.f_back
+        self.samples[';'.join(reversed(stack))] += 1
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def get_profiler(path=None, mode=None, **kwds):
+    """Get profiler configured with environment variables.
+
+    Parameters
+    ----------
+    path : str or None
+        Path prefix of result files.
+        :py:data:`PROFILE_ENV` environment variable is used if ``None``.
+    mode : str or None
+        CPU profiling mode.
+        :py:data:`PROFILE_MODE_ENV` environment variable
+        or ``'cprofile'`` is used if ``None``.
+    **kwds :
+        Passed to :py:class:`Profiler`.
+
+    Returns
+    -------
+    Profiler or None
+        Profiler or ``None`` if profiling is not enabled.
+    """
+    path = path or os.environ.get(PROFILE_ENV)
+    if not path:
+        return None
+    mode = mode or os.environ.get(PROFILE_MODE_ENV) or 'cprofile'
+    return Profiler(path, mode=mode, **kwds)
+
+def load_profile(path):
+    """Load profiling results.
+
+    Parameters
+    ----------
+    path : str
+        Path prefix of result files.
+
+    Returns
+    -------
+    dict
+        Available results: ``stats`` (:py:class:`pstats.Stats`),
+        ``samples`` (:py:class:`collections.Counter` of collapsed stacks),
+        ``snapshot`` (:py:class:`tracemalloc.Snapshot`)
+        and ``allocations`` (top allocations report).
+    """
+    results = {}
+    if os.path.exists(path+'.pstats'):
+        results['stats'] = pstats.Stats(path+'.pstats')
+    if os.path.exists(path+'.samples.txt'):
+        samples = Counter()
+        with open(path+'.samples.txt') as f:
+            for line in f:
+                stack, n = line.rstrip('\n').rsplit(' ', 1)
+                samples[stack] += int(n)
+        results['samples'] = samples
+    if os.path.exists(path+'.tracemalloc'):
+        results['snapshot'] = tracemalloc.Snapshot.load(path+'.tracemalloc')
+    if os.path.exists(path+'.alloc.txt'):
+        with open(path+'.alloc.txt') as f:
+            results['allocations'] = f.read()
+    return results
+
+def open_profile(path, shells=None):
+    """Open profiling results in an interactive console.
+
+    Parameters
+    ----------
+    path : str
+        Path prefix of result files.
+    shells : list of str or None
+        Preferred shells (see :py:func:`taukit.cli.console.start_python_console`).
+    """
+    from .cli.console import start_python_console
+    namespace = load_profile(path)
+    if not namespace:
+        raise FileNotFoundError(f"no profiling results for '{path}'")
+    banner = "Profiling results: " + ", ".join(sorted(namespace))
+    if 'stats' in namespace:
+        banner += "\n(i.e. stats.sort_stats('cumulative').print_stats(20))"
+    start_python_console(namespace=namespace, banner=banner, shells=shells)
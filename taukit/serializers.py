@@ -1,10 +1,33 @@
-"""Serializer and deserializer functions and classes."""
+"""Serializer and deserializer functions and classes.
+
+Classes from optional heavy dependencies (*Scrapy* and *Cerberus*)
+are handled without importing them, since instances of their classes
+may exist only if they were already imported.
+"""
 # pylint: disable=E0202
+import sys
 from datetime import datetime, date
 from json import JSONEncoder as _JSONEncoder
-from scrapy import Item
-from cerberus import Validator
-from cerberus.schema import DefinitionSchema
+
+
+def _get_class(module, name):
+    """Get class from a module only if it is already imported.
+
+    Parameters
+    ----------
+    module : str
+        Module name.
+    name : str
+        Class name.
+
+    Returns
+    -------
+    type or tuple
+        Class or an empty tuple (which is matched by no object
+        in `isinstance` checks) if the module is not imported.
+    """
+    module = sys.modules.get(module)
+    return getattr(module, name, ()) if module else ()
 
 
 class JSONEncoder(_JSONEncoder):
@@ -17,9 +40,10 @@ class JSONEncoder(_JSONEncoder):
         """Serializer method."""
         if isinstance(o, (date, datetime)):
             return o.isoformat()
-        if isinstance(o, (Item, DefinitionSchema)):
+        if isinstance(o, (_get_class('scrapy.item', 'Item'),
+                          _get_class('cerberus.schema', 'DefinitionSchema'))):
             return dict(o)
-        if isinstance(o, Validator):
+        if isinstance(o, _get_class('cerberus.validator', 'BareValidator')):
             return dict(o.schema)
         return super().default(o)
 
@@ -1,12 +1,19 @@
 """General purpose utilities."""
 import re
 import os
+import sys
+import json
 import hashlib
+from stat import S_ISREG
+from collections import OrderedDict
+from functools import lru_cache, reduce
 from importlib import import_module
-from click import echo
+from importlib.util import resolve_name
+from string import Formatter
 
-_rx_pp = re.compile(r"^[\w_.:]+$", re.ASCII)
+_rx_pp = re.compile(r"^[\w.]+(:[\w.]+)?$", re.ASCII)
 _rx_file = re.compile(r"\.[a-z]*$", re.IGNORECASE)
+_existing_dirs = set()
 
 def safe_print(x, nl=True, **kwds):
     """Fault-safe print function.
@@ -20,35 +27,151 @@ def safe_print(x, nl=True, **kwds):
     **kwds :
         Other arguments passed to `click.echo`.
     """
+    from click import echo
     try:
         echo(x, nl=nl, **kwds)
     except UnicodeEncodeError:
         x = str(x).encode('utf-8', 'replace')
         echo(x, **kwds)
 
+def _split_python_path(path, package=None):
+    """Split python path into absolute module name and object name."""
+    parts = path.split(':')
+    if len(parts) > 2:
+        msg = f"Not a correct path ('{path}' has more than one object qualifier)"
+        raise ValueError(msg)
+    elif len(parts) == 2:
+        module_path, obj = parts
+    else:
+        module_path, obj = path, None
+    return resolve_name(module_path, package), obj
+
+@lru_cache(maxsize=1024)
 def import_python(path, package=None):
     """Get python module or object.
 
+    Resolved paths are cached, so repeated calls do not
+    split paths and import modules again.
+
     Parameters
     ----------
     path : str
         Fully-qualified python path, i.e. `package.module:object`.
+        Object name may be dotted, i.e. `package.module:Class.attr`.
     package : str or None
         Package name to use as an anchor if `path` is relative.
     """
-    parts = path.split(':')
-    if len(parts) > 2:
-        msg = f"Not a correct path ('{path}' has more than one object qualifier)"
-        raise ValueError(msg)
-    elif len(parts) == 2:
-        module_path, obj = parts
-    else:
-        module_path, obj = path, None
-    module = import_module(module_path, package=package)
+    module_path, obj = _split_python_path(path, package)
+    module = import_module(module_path)
     if obj:
-        return getattr(module, obj)
+        return reduce(getattr, obj.split('.'), module)
     return module
 
+def resolve_many(paths, package=None, lazy=False):
+    """Resolve multiple python paths.
+
+    Modules are imported once each and in dependency order,
+    i.e. packages are imported before their submodules.
+
+    Parameters
+    ----------
+    paths : iterable of str
+        Fully-qualified python paths.
+    package : str or None
+        Package name to use as an anchor for relative paths.
+    lazy : bool
+        Should :py:class:`LazyPython` proxies be returned instead.
+
+    Returns
+    -------
+    list
+        Resolved objects in the same order as paths.
+    """
+    paths = list(paths)
+    if lazy:
+        return [ LazyPython(path, package) for path in paths ]
+    modules = { _split_python_path(path, package)[0] for path in paths }
+    for module in sorted(modules, key=lambda m: (m.count('.'), m)):
+        import_module(module)
+    return [ import_python(path, package) for path in paths ]
+
+
+class LazyPython:
+    """Lazy proxy of a python module or object.
+
+    The path is resolved with :py:func:`import_python`
+    on the first attribute access or call.
+    Note that proxies do not pass `isinstance` and `issubclass` checks,
+    so the :py:meth:`resolve` method should be used when this is needed.
+    """
+    __slots__ = ('path', 'package', '_obj')
+
+    def __init__(self, path, package=None):
+        """Initialization method.
+
+        Parameters
+        ----------
+        path : str
+            Fully-qualified python path, i.e. `package.module:object`.
+        package : str or None
+            Package name to use as an anchor if `path` is relative.
+        """
+        self.path = path
+        self.package = package
+        self._obj = None
+
+    def resolve(self):
+        """Get the proxied object."""
+        if self._obj is None:
+            self._obj = import_python(self.path, self.package)
+        return self._obj
+
+    def __getattr__(self, attr):
+        # Unset slots (i.e. in copies made without `__init__`)
+        # must not be resolved, as `resolve` reads them.
+        if attr in LazyPython.__slots__:
+            raise AttributeError(attr)
+        return getattr(self.resolve(), attr)
+
+    def __call__(self, *args, **kwds):
+        return self.resolve()(*args, **kwds)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} '{self.path}'>"
+
+def lazy_attributes(module, attributes):
+    """Make module level ``__getattr__`` and ``__dir__`` for lazy attributes.
+
+    Attributes are imported on the first access (see :pep:`562`),
+    so importing a package does not import its heavy dependencies.
+
+    Parameters
+    ----------
+    module : str
+        Name of the module defining lazy attributes.
+    attributes : dict
+        Mapping from attribute names to (possibly relative)
+        names of modules providing them.
+
+    Returns
+    -------
+    tuple of functions
+        ``__getattr__`` and ``__dir__`` functions.
+    """
+    namespace = sys.modules[module].__dict__
+    def __getattr__(name):
+        try:
+            path = attributes[name]
+        except KeyError:
+            raise AttributeError(f"module '{module}' has no attribute '{name}'")
+        value = getattr(import_module(path, package=module), name)
+        namespace[name] = value
+        return value
+    def __dir__():
+        return sorted({ *namespace, *attributes })
+    return __getattr__, __dir__
+
+@lru_cache(maxsize=1024)
 def is_python_path(path, object_only=False):
     """Check if a string is a valid python path.
 
@@ -60,8 +183,7 @@ def is_python_path(path, object_only=False):
         Should `True` be returned only for object specifying paths.
     """
     m = _rx_pp.match(path)
-    n_colons = path.count(':')
-    if not m or n_colons > 1 or (object_only and n_colons != 1):
+    if not m or (object_only and not m.group(1)):
         return False
     return True
 
@@ -79,24 +201,127 @@ def hash_string(string, salt=None):
         string += salt
     return hashlib.md5(string.encode('utf-8')).hexdigest()
 
+def get_unique_key(obj):
+    """Get key for identifying duplicated objects.
+
+    Hashable objects are their own keys.
+    Unhashable objects (i.e. dicts and lists) are identified
+    by a digest of their canonical JSON representation.
+
+    Parameters
+    ----------
+    obj : any
+        Some object.
+    """
+    try:
+        hash(obj)
+        return obj
+    except TypeError:
+        pass
+    try:
+        dump = json.dumps(obj, sort_keys=True, separators=(',', ':'), default=repr)
+    except TypeError:
+        dump = repr(obj)
+    return (type(obj), hash_string(dump))
+
+def iter_unique(iterable, maxsize=None, key=None):
+    """Iterate over unique objects.
+
+    Objects are compared using keys returned by :py:func:`get_unique_key`,
+    so every check is a constant time hash lookup.
+
+    Parameters
+    ----------
+    iterable : iterable
+        Some iterable.
+    maxsize : int or None
+        Number of most recently seen keys to remember.
+        If `None` then all keys are remembered.
+        Otherwise memory usage is bounded, but duplicates
+        that are further apart than `maxsize` unique objects are repeated.
+    key : callable or None
+        Optional function applied to objects before comparing them.
+    """
+    get_key = (lambda obj: get_unique_key(key(obj))) if key else get_unique_key
+    if maxsize is None:
+        seen = set()
+        for obj in iterable:
+            k = get_key(obj)
+            if k in seen:
+                continue
+            seen.add(k)
+            yield obj
+        return
+    recent = OrderedDict()
+    for obj in iterable:
+        k = get_key(obj)
+        if k in recent:
+            recent.move_to_end(k)
+            continue
+        recent[k] = None
+        if len(recent) > maxsize:
+            recent.popitem(last=False)
+        yield obj
+
 def is_file(path):
     """Tell if a path is a file path.
 
     In case of non-existent file paths the file extenstions
     serves as a file signature.
+    Directories known to exist (see :py:func:`make_path`)
+    are recognized without any system calls.
 
     Parameters
     ----------
     path : str
         Some path.
     """
-    if os.path.exists(path):
-        return os.path.isfile(path)
-    return bool(_rx_file.search(path))
+    if os.path.normpath(path) in _existing_dirs:
+        return False
+    try:
+        return S_ISREG(os.stat(path).st_mode)
+    except OSError:
+        return bool(_rx_file.search(path))
+
+def clear_path_cache(path=None):
+    """Forget directories known to exist.
+
+    It should be called when directories are removed
+    or when writing to a directory fails.
+
+    Parameters
+    ----------
+    path : str or None
+        Forget only this directory and its subdirectories.
+        Forget all directories if `None`.
+    """
+    if path is None:
+        _existing_dirs.clear()
+        return
+    path = os.path.normpath(path)
+    prefix = os.path.join(path, '')
+    for dirpath in [ d for d in _existing_dirs if d == path or d.startswith(prefix) ]:
+        _existing_dirs.discard(dirpath)
+
+def _make_dir(dirpath, **kwds):
+    """Create directory if it is not known to exist."""
+    dirpath = os.path.normpath(dirpath)
+    if dirpath in _existing_dirs:
+        return
+    os.makedirs(dirpath, exist_ok=True, **kwds)
+    _existing_dirs.add(dirpath)
 
 def make_path(*args, create_dir=True, **kwds):
     """Make path from fragments and create dir if does not exist.
 
+    Directories are created only once per process.
+    Directories created or found are cached, so subsequent calls
+    for file paths (with extensions) in the same directories
+    do not make any system calls. Other paths are checked
+    with :py:func:`is_file`, which calls `os.stat` for paths
+    not known to be directories.
+    Use :py:func:`clear_path_cache` if directories may be removed.
+
     Parameters
     ----------
     *args :
@@ -107,12 +332,97 @@ def make_path(*args, create_dir=True, **kwds):
         Other arguments passed to `os.makedirs`.
     """
     path = os.path.join(*args)
-    dirpath = os.path.dirname(path) if is_file(path) else path
-    if create_dir and not os.path.exists(dirpath):
-        os.makedirs(dirpath, exist_ok=True, **kwds)
+    if create_dir:
+        dirpath = os.path.dirname(path)
+        if dirpath and _rx_file.search(path) \
+        and os.path.normpath(dirpath) in _existing_dirs:
+            return path
+        dirpath = dirpath if is_file(path) else path
+        if dirpath:
+            _make_dir(dirpath, **kwds)
     return path
 
-def make_filepath(filename, dirpath, inc_if_taken=True, **kwds):
+def make_paths(paths, create_dir=True, **kwds):
+    """Make many paths and create their directories.
+
+    Parameters
+    ----------
+    paths : iterable of str or tuples of str
+        Paths or tuples of path fragments.
+    create_dir : bool
+        Should directories be created if necessary.
+    **kwds :
+        Other arguments passed to `os.makedirs`.
+
+    Returns
+    -------
+    list of str
+        Paths.
+    """
+    return [
+        make_path(*((p,) if isinstance(p, str) else p), create_dir=create_dir, **kwds)
+        for p in paths
+    ]
+
+def _make_filename_regex(template, **kwds):
+    """Make regex matching file names generated from a format string.
+
+    Parameters
+    ----------
+    template : str
+        Formattable file name with a named placeholder `{n}`.
+    **kwds :
+        Values of other placeholders.
+
+    Returns
+    -------
+    re.Pattern or None
+        Compiled regex with a named group `n` or ``None``
+        if `{n}` has a format spec or a conversion (i.e. `{n:x}`),
+        so counters can not be parsed back from file names.
+    """
+    formatter = Formatter()
+    regex = ''
+    has_n = False
+    for literal, field, spec, conv in formatter.parse(template):
+        regex += re.escape(literal)
+        if field is None:
+            continue
+        if field == 'n':
+            if spec or conv:
+                return None
+            regex += r"(?P=n)" if has_n else r"(?P<n>\d+)"
+            has_n = True
+            continue
+        value = formatter.get_field(field, (), kwds)[0]
+        value = formatter.format_field(formatter.convert_field(value, conv), spec)
+        regex += re.escape(value)
+    return re.compile(regex+'$')
+
+def _find_counters(head, tail, **kwds):
+    """Find counter values used by existing files.
+
+    Returns
+    -------
+    set of int or None
+        Counter values or ``None`` if they can not be found
+        by scanning the directory (see :py:func:`_make_filename_regex`).
+    """
+    regex = _make_filename_regex(tail, **kwds)
+    if regex is None:
+        return None
+    taken = set()
+    try:
+        with os.scandir(head or os.curdir) as entries:
+            for entry in entries:
+                m = regex.match(entry.name)
+                if m:
+                    taken.add(int(m.group('n')))
+    except FileNotFoundError:
+        pass
+    return taken
+
+def make_filepath(filename, dirpath, inc_if_taken=True, create=False, **kwds):
     """Make filepath for a given filename.
 
     This function allows for not overwriting existing files
@@ -121,6 +431,12 @@ def make_filepath(filename, dirpath, inc_if_taken=True, **kwds):
     with a named placeholder `{n}`. Other named placeholder may be
     filled through `**kwds`.
 
+    The first free counter value is found by scanning the directory
+    once (instead of checking every consecutive counter value).
+    Counters with format specs (i.e. `{n:03x}`) can not be parsed back
+    from file names, so consecutive values are checked then.
+    The chosen file name is always checked to be free.
+
     Parameters
     ----------
     filename : str
@@ -129,15 +445,86 @@ def make_filepath(filename, dirpath, inc_if_taken=True, **kwds):
         Directory path.
     inc_if_taken : bool
         Should file counter be used and incremented if a name is already taken.
+    create : bool
+        Should an empty file be created.
+        File is created atomically (with ``O_EXCL`` flag),
+        so concurrent writers never get the same file.
+        If `inc_if_taken` is used, the counter is incremented until
+        an unused file name is found.
     **kwds :
         Optional keyword arguments passed to the format string.
+
+    Raises
+    ------
+    FileExistsError
+        If `create=True` and the file already exists and can not be
+        replaced with another file name.
     """
+    filepath = os.path.join(dirpath, filename)
+    fields = { f for _, f, _, _ in Formatter().parse(filepath) if f is not None }
+    if not inc_if_taken or 'n' not in fields:
+        if inc_if_taken:
+            filepath = filepath.format(**kwds)
+        if create:
+            _create_file(filepath)
+        return filepath
+    head, tail = os.path.split(filepath)
+    head = head.format(**kwds)
+    taken = _find_counters(head, tail, **kwds) or ()
     n = 0
-    _filepath = os.path.join(dirpath, filename)
-    filepath = _filepath
-    while inc_if_taken:
+    while True:
         n += 1
-        filepath = _filepath.format(n=n, **kwds)
-        if not os.path.exists(filepath):
-            break
-    return filepath
+        if n in taken:
+            continue
+        filepath = os.path.join(head, tail.format(n=n, **kwds))
+        if not create:
+            if os.path.exists(filepath):
+                continue
+            return filepath
+        try:
+            _create_file(filepath)
+            return filepath
+        except FileExistsError:
+            continue
+
+def find_filepath(filename, dirpath, **kwds):
+    """Find the last existing file made with :py:func:`make_filepath`.
+
+    Parameters
+    ----------
+    filename : str
+        File name. It may be a formattable string
+        with a named placeholder `{n}`.
+    dirpath : str
+        Directory path.
+    **kwds :
+        Optional keyword arguments passed to the format string.
+
+    Returns
+    -------
+    str or None
+        Path of the existing file with the highest counter value
+        (or with the given name if there is no counter)
+        or ``None`` if there is no such file.
+    """
+    filepath = os.path.join(dirpath, filename)
+    fields = { f for _, f, _, _ in Formatter().parse(filepath) if f is not None }
+    if 'n' not in fields:
+        filepath = filepath.format(**kwds)
+        return filepath if os.path.exists(filepath) else None
+    head, tail = os.path.split(filepath)
+    head = head.format(**kwds)
+    taken = _find_counters(head, tail, **kwds)
+    if taken is None:
+        n = 1
+        while os.path.exists(os.path.join(head, tail.format(n=n, **kwds))):
+            n += 1
+        taken = { n - 1 } if n > 1 else ()
+    if not taken:
+        return None
+    return os.path.join(head, tail.format(n=max(taken), **kwds))
+
+def _create_file(filepath):
+    """Create an empty file. Raise if it already exists."""
+    fd = os.open(filepath, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+    os.close(fd)
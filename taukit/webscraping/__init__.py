@@ -0,0 +1,17 @@
+"""Webscraping utilities based on *Scrapy*.
+
+Public objects are imported lazily on the first access,
+so *Scrapy* is imported only when it is actually used.
+"""
+from ..utils import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'Item': '.itemcls',
+    'ItemLoader': '.itemcls',
+    'TauSpiderMixin': '.spidercls',
+    'OffsiteFinalUrlDownloaderMiddleware': '.middlewares',
+    'PersisterPipeline': '.pipelines',
+    'ProfilerExtension': '.extensions',
+    'CSS': '.selectors',
+    'XPath': '.selectors'
+})
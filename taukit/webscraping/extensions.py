@@ -0,0 +1,76 @@
+"""Custom scrapy extensions."""
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from ..profiling import get_profiler
+
+
+class ProfilerExtension:
+    """Extension profiling crawls.
+
+    CPU time and memory allocations are profiled from opening
+    to closing of a spider with :py:class:`taukit.profiling.Profiler`.
+    Paths of result files are recorded by the stats collector
+    as ``profile/<kind>`` and may be opened with
+    :py:func:`taukit.profiling.open_profile`.
+
+    It is enabled by adding it to ``EXTENSIONS`` setting
+    and is configured with the following settings:
+
+    ``TAUKIT_PROFILE``
+        Path prefix of result files. It may contain ``{name}``
+        placeholder for the spider name. Defaults to ``TAUKIT_PROFILE``
+        environment variable. The extension is disabled if it is not defined.
+    ``TAUKIT_PROFILE_MODE``
+        CPU profiling mode (``cprofile`` or ``sample``).
+        Defaults to ``TAUKIT_PROFILE_MODE`` environment variable
+        or ``cprofile``.
+    ``TAUKIT_PROFILE_MEMORY``
+        Should memory allocations be traced. Defaults to ``True``.
+    """
+    def __init__(self, path=None, mode=None, memory=True, stats=None):
+        """Initialization method.
+
+        Parameters
+        ----------
+        path : str or None
+            Path prefix of result files.
+        mode : str or None
+            CPU profiling mode.
+        memory : bool
+            Should memory allocations be traced.
+        stats : scrapy.statscollectors.StatsCollector or None
+            Stats collector.
+        """
+        if get_profiler(path) is None:
+            raise NotConfigured("'TAUKIT_PROFILE' is not defined")
+        self.path = path
+        self.mode = mode
+        self.memory = memory
+        self.stats = stats
+        self.profilers = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Make extension from a crawler."""
+        settings = crawler.settings
+        ext = cls(
+            path=settings.get('TAUKIT_PROFILE'),
+            mode=settings.get('TAUKIT_PROFILE_MODE'),
+            memory=settings.getbool('TAUKIT_PROFILE_MEMORY', True),
+            stats=crawler.stats
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        profiler = get_profiler(self.path, self.mode, memory=self.memory)
+        profiler.path = profiler.path.format(name=spider.name)
+        self.profilers[spider] = profiler.start()
+
+    def spider_closed(self, spider):
+        profiler = self.profilers.pop(spider)
+        for kind, path in profiler.stop().items():
+            spider.logger.info("Profiling results written to '%s'", path)
+            if self.stats is not None:
+                self.stats.set_value(f'profile/{kind}', path, spider=spider)
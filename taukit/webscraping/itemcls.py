@@ -2,7 +2,7 @@
 from scrapy import Item as _Item
 from scrapy.loader import ItemLoader as _ItemLoader
 from scrapy.loader.processors import TakeFirst, MapCompose
-from cerberus import Validator
+from ..base.validators import ValidatorPool, copy_schema
 from .utils import normalize_web_content, strip
 from .selectors import CSS, XPath
 
@@ -100,7 +100,7 @@ class ItemLoader(_ItemLoader):
             Metadata obtained from the response-request.
         """
         itemcls = self.default_item_class
-        data = itemcls.get_schema().normalized(data)
+        data = itemcls.get_schema().compiled.normalized(data)
         self.data = data
 
     def load_item(self):
@@ -117,11 +117,24 @@ class Item(_Item):
     _schema = {}
 
     @classmethod
-    def get_schema(cls):
-        """Schema getter."""
-        if not isinstance(cls._schema, Validator):
-            cls._schema = Validator({
+    def get_validator_pool(cls):
+        """Validator pool getter.
+
+        Pool is created once per item class.
+        """
+        pool = cls.__dict__.get('_validator_pool')
+        if pool is None:
+            pool = ValidatorPool({
                 **cls.fields,
-                **cls._schema
+                **copy_schema(cls._schema)
             }, allow_unknown=False, purge_unknown=True)
-        return cls._schema
+            cls._validator_pool = pool
+        return pool
+
+    @classmethod
+    def get_schema(cls):
+        """Schema getter.
+
+        Validator is local to the current thread.
+        """
+        return cls.get_validator_pool().get()
@@ -8,9 +8,97 @@
 
 # pylint: disable=W0613
 
+import os
+import re
+import hashlib
+from time import time
+from weakref import WeakKeyDictionary
 # from scrapy import signals
 from scrapy.exceptions import IgnoreRequest
-from .utils import is_url_in_domains
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.project import data_path
+from ..persistence import PackFile, dump_response_record, load_response_record
+from .utils import get_url_domain, canonicalize_url
+
+_rx_inline_flags = re.compile(r"\(\?[aiLmsux]+\)")
+
+
+class UrlMatcher:
+    """Matcher of allowed and blacklisted URLs.
+
+    Allowed domains are kept in a set and blacklisted URLs
+    are split into a set of fixed canonical URLs and regexps combined
+    into one pattern per set of flags, so checking an URL costs
+    one cached domain lookup, one set lookup and a few regexp searches
+    regardless of lengths of the lists.
+
+    Only regexps without groups and global inline flags are combined,
+    since group names and numbers (i.e. in backreferences) and inline flags
+    would change their meaning. Other regexps are searched separately.
+
+    Attributes
+    ----------
+    domains : frozenset or None
+        Allowed domains. All domains are allowed if ``None``.
+    blacklist : frozenset
+        Blacklisted canonical URLs.
+    patterns : list of re.Pattern
+        Combined and separate patterns of blacklisted URLs.
+    """
+    def __init__(self, allowed_domains=None, blacklist_urls=()):
+        """Initialization method.
+
+        Parameters
+        ----------
+        allowed_domains : str or iterable of str or None
+            Allowed domains.
+        blacklist_urls : iterable of str or re.Pattern
+            Blacklisted URLs and URL patterns.
+        """
+        if isinstance(allowed_domains, str):
+            allowed_domains = [ allowed_domains ]
+        self.domains = frozenset(allowed_domains) if allowed_domains else None
+        self.blacklist = frozenset(
+            canonicalize_url(u) for u in blacklist_urls if isinstance(u, str)
+        )
+        groups = {}
+        self.patterns = []
+        for pattern in blacklist_urls:
+            if isinstance(pattern, str):
+                continue
+            if pattern.groups or _rx_inline_flags.match(pattern.pattern):
+                self.patterns.append(pattern)
+            else:
+                groups.setdefault(pattern.flags, []).append(pattern)
+        for flags, patterns in groups.items():
+            try:
+                combined = '|'.join(f'(?:{p.pattern})' for p in patterns)
+                self.patterns.append(re.compile(combined, flags))
+            except re.error:
+                self.patterns.extend(patterns)
+
+    @classmethod
+    def from_spider(cls, spider):
+        """Make matcher from `allowed_domains` and `blacklist_urls` of a spider."""
+        return cls(
+            allowed_domains=getattr(spider, 'allowed_domains', None),
+            blacklist_urls=getattr(spider, 'blacklist_urls', ())
+        )
+
+    def is_offsite(self, url):
+        """Check if URL is not within allowed domains."""
+        return self.domains is not None and get_url_domain(url) not in self.domains
+
+    def is_blacklisted(self, url):
+        """Check if URL is blacklisted."""
+        if self.blacklist and canonicalize_url(url) in self.blacklist:
+            return True
+        return any(pattern.search(url) for pattern in self.patterns)
+
+    def is_allowed(self, url):
+        """Check if URL is allowed."""
+        return not self.is_offsite(url) and not self.is_blacklisted(url)
 
 
 class OffsiteFinalUrlDownloaderMiddleware:
@@ -25,18 +113,101 @@ class OffsiteFinalUrlDownloaderMiddleware:
 
     This middleware additionaly uses optional `blacklist_urls` attribute
     to filter out unwanted urls (based on fixed string and/or regexps).
+
+    Requests are checked also before downloading. Redirect targets
+    are checked too, since redirects are scheduled as new requests,
+    so offsite or blacklisted redirects are dropped before being downloaded.
+    Matchers are compiled once per spider (see :py:class:`UrlMatcher`).
     """
+    def __init__(self):
+        """Initialization method."""
+        self.matchers = WeakKeyDictionary()
+
+    def get_matcher(self, spider):
+        """Get (and compile if needed) URL matcher of a spider."""
+        try:
+            return self.matchers[spider]
+        except KeyError:
+            matcher = self.matchers[spider] = UrlMatcher.from_spider(spider)
+            return matcher
+
+    def process_request(self, request, spider):
+        """Process request hook."""
+        if not self.get_matcher(spider).is_allowed(request.url):
+            spider.logger.debug("Filtered offsite or blacklisted request to %s", request.url)
+            raise IgnoreRequest(request)
+
     def process_response(self, request, response, spider):
         """Process response hook."""
-        allowed_domains = getattr(spider, 'allowed_domains', None)
-        blacklist_urls = getattr(spider, 'blacklist_urls', [])
-        url = response.url
-        # Offsite check
-        if not is_url_in_domains(url, allowed_domains):
+        if not self.get_matcher(spider).is_allowed(response.url):
             raise IgnoreRequest(request)
-        # Blacklist check
-        for bad_url in blacklist_urls:
-            if (isinstance(bad_url, str) and url == bad_url) \
-            or bad_url.search(url):
-                raise IgnoreRequest(request)
         return response
+
+
+class PackFileCacheStorage:
+    """HTTP cache storage keeping all responses of a spider in one pack file.
+
+    It is meant to be used with the standard
+    :py:class:`scrapy.downloadermiddlewares.httpcache.HttpCacheMiddleware`
+    by setting ``HTTPCACHE_STORAGE`` to
+    ``'taukit.webscraping.middlewares.PackFileCacheStorage'``.
+
+    Response bodies are stored compressed in an append-only
+    :py:class:`taukit.persistence.PackFile` (``<spider name>.pack``
+    in ``HTTPCACHE_DIR``) and are keyed by request method, canonicalized URL
+    and a digest of the request body (if not empty), so re-runs may
+    re-apply extraction without downloading pages again.
+    Unlike the default filesystem storage it does not create any files
+    per response. ``HTTPCACHE_EXPIRATION_SECS`` is respected.
+    """
+    def __init__(self, settings):
+        """Initialization method.
+
+        Parameters
+        ----------
+        settings : scrapy.settings.Settings
+            Crawler settings.
+        """
+        self.cachedir = data_path(settings['HTTPCACHE_DIR'], createdir=True)
+        self.expiration_secs = settings.getint('HTTPCACHE_EXPIRATION_SECS')
+        self.packs = {}
+
+    @staticmethod
+    def get_key(request):
+        """Get cache key of a request."""
+        key = request.method+' '+canonicalize_url(request.url)
+        if request.body:
+            key += ' '+hashlib.sha1(request.body).hexdigest()
+        return key
+
+    def open_spider(self, spider):
+        path = os.path.join(self.cachedir, spider.name+'.pack')
+        self.packs[spider] = PackFile(path).open()
+        spider.logger.debug(f"Using pack file cache storage in {path}")
+
+    def close_spider(self, spider):
+        self.packs.pop(spider).close()
+
+    def retrieve_response(self, spider, request):
+        """Return response if present in cache, or `None` otherwise."""
+        data = self.packs[spider].get(self.get_key(request))
+        if data is None:
+            return None
+        record = load_response_record(data)
+        if 0 < self.expiration_secs < time() - record['timestamp']:
+            return None
+        url = record['url']
+        body = record['body']
+        headers = Headers(record['headers'])
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        return respcls(url=url, headers=headers, status=record['status'], body=body)
+
+    def store_response(self, spider, request, response):
+        """Store the given response in the cache."""
+        headers = {
+            k.decode('latin-1'): [ v.decode('latin-1') for v in vs ]
+            for k, vs in response.headers.items()
+        }
+        data = dump_response_record(response.url, response.status, headers,
+                                    response.body, timestamp=time())
+        self.packs[spider].append(self.get_key(request), data)
@@ -0,0 +1,171 @@
+"""Custom scrapy item pipeline classes."""
+# pylint: disable=W0613
+from twisted.internet.defer import DeferredLock, succeed
+from twisted.internet.threads import deferToThread
+from scrapy.exceptions import NotConfigured
+from ..utils import import_python
+
+
+class PersisterPipeline:
+    """Item pipeline persisting items with a persister.
+
+    Any :py:class:`taukit.persistence.Persister` subclass may be used.
+    Items are buffered per spider and persisted in batches.
+    Batches are written in a thread pool, one at a time per spider,
+    so the *Twisted* reactor is never blocked by I/O.
+    Remaining items are persisted when a spider is closed
+    and then the persister is closed (if it has a `close` method).
+    The item completing a batch is passed on only when its batch
+    is written, so scrapy stops processing new responses
+    (see ``SCRAPER_SLOT_MAX_ACTIVE_SIZE``) when writing is slower
+    than crawling and the number of pending batches stays bounded.
+
+    The pipeline is configured with the following settings:
+
+    ``TAUKIT_PERSISTER``
+        Persister class or its python path (i.e. ``package.module:Class``).
+    ``TAUKIT_PERSISTER_KWDS``
+        Keyword arguments passed to the persister class.
+        They are updated with the optional ``persister_kwds``
+        attribute of a spider.
+    ``TAUKIT_PERSISTER_BATCH_SIZE``
+        Number of items persisted at once. Defaults to 100.
+
+    Numbers of persisted items, batches and bytes (if returned by
+    the `persist` method of the persister) are recorded by the stats
+    collector as ``persister/items``, ``persister/batches`` and
+    ``persister/bytes``. Queue depth (buffered items and items
+    of batches waiting to be written) is tracked by metrics of the persister
+    (see :py:class:`taukit.metrics.PersisterMetrics`) and its final
+    encode and write times are recorded as ``persister/encode_time``
+    and ``persister/write_time`` when a spider is closed.
+    Failed batches are logged and their items are counted
+    as ``persister/errors`` and ``persister/dropped_items``.
+    """
+    def __init__(self, persister_cls, persister_kwds=None, batch_size=100, stats=None):
+        """Initialization method.
+
+        Parameters
+        ----------
+        persister_cls : type
+            Persister class.
+        persister_kwds : dict or None
+            Keyword arguments passed to the persister class.
+        batch_size : int
+            Number of items persisted at once.
+        stats : scrapy.statscollectors.StatsCollector or None
+            Stats collector.
+        """
+        self.persister_cls = persister_cls
+        self.persister_kwds = persister_kwds or {}
+        self.batch_size = batch_size
+        self.stats = stats
+        self.persisters = {}
+        self.buffers = {}
+        self.locks = {}
+        self.pending = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Make pipeline from a crawler."""
+        settings = crawler.settings
+        persister_cls = settings.get('TAUKIT_PERSISTER')
+        if not persister_cls:
+            raise NotConfigured("'TAUKIT_PERSISTER' setting is not defined")
+        if isinstance(persister_cls, str):
+            persister_cls = import_python(persister_cls)
+        return cls(
+            persister_cls=persister_cls,
+            persister_kwds=settings.getdict('TAUKIT_PERSISTER_KWDS'),
+            batch_size=settings.getint('TAUKIT_PERSISTER_BATCH_SIZE', 100),
+            stats=crawler.stats
+        )
+
+    def make_persister(self, spider):
+        """Make persister for a spider."""
+        kwds = { **self.persister_kwds, **getattr(spider, 'persister_kwds', {}) }
+        return self.persister_cls(**kwds)
+
+    def open_spider(self, spider):
+        self.persisters[spider] = self.make_persister(spider)
+        self.buffers[spider] = []
+        self.locks[spider] = DeferredLock()
+        self.pending[spider] = 0
+
+    def close_spider(self, spider):
+        d = self.flush(spider)
+        def cleanup(result):
+            metrics = getattr(self.persisters[spider], 'metrics', None)
+            if metrics is not None:
+                if self.stats is not None:
+                    self.stats.set_value('persister/encode_time', metrics.encode_time,
+                                         spider=spider)
+                    self.stats.set_value('persister/write_time', metrics.write_time,
+                                         spider=spider)
+                if metrics.dump_path:
+                    metrics.dump()
+            persister = self.persisters.pop(spider)
+            if hasattr(persister, 'close'):
+                persister.close()
+            del self.buffers[spider]
+            del self.locks[spider]
+            del self.pending[spider]
+            return result
+        d.addBoth(cleanup)
+        return d
+
+    def process_item(self, item, spider):
+        buffer = self.buffers[spider]
+        buffer.append(item)
+        if len(buffer) >= self.batch_size:
+            d = self.flush(spider)
+            d.addCallback(lambda _: item)
+            return d
+        self._set_queue_depth(spider)
+        return item
+
+    def flush(self, spider):
+        """Persist buffered items of a spider.
+
+        Returns
+        -------
+        twisted.internet.defer.Deferred
+            Fired when the items are persisted.
+        """
+        batch = self.buffers[spider]
+        if not batch:
+            return self.locks[spider].run(succeed, None)
+        self.buffers[spider] = []
+        self.pending[spider] += len(batch)
+        self._set_queue_depth(spider)
+        persister = self.persisters[spider]
+        d = self.locks[spider].run(deferToThread, persister.persist, batch)
+        d.addCallback(self._update_stats, batch, spider)
+        d.addErrback(self._log_error, batch, spider)
+        d.addBoth(self._done, batch, spider)
+        return d
+
+    def _set_queue_depth(self, spider):
+        metrics = getattr(self.persisters[spider], 'metrics', None)
+        if metrics is not None:
+            metrics.set_queue_depth(self.pending[spider] + len(self.buffers[spider]))
+
+    def _done(self, result, batch, spider):
+        self.pending[spider] -= len(batch)
+        self._set_queue_depth(spider)
+        return result
+
+    def _update_stats(self, result, batch, spider):
+        if self.stats is None:
+            return
+        self.stats.inc_value('persister/items', len(batch), spider=spider)
+        self.stats.inc_value('persister/batches', spider=spider)
+        if isinstance(result, int):
+            self.stats.inc_value('persister/bytes', result, spider=spider)
+
+    def _log_error(self, failure, batch, spider):
+        spider.logger.error(f"Persisting a batch failed, {len(batch)} items were dropped",
+                            exc_info=(failure.type, failure.value, failure.getTracebackObject()))
+        if self.stats is not None:
+            self.stats.inc_value('persister/errors', spider=spider)
+            self.stats.inc_value('persister/dropped_items', len(batch), spider=spider)
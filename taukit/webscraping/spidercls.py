@@ -1,7 +1,14 @@
 """Generic spider classes."""
+import json
 from logging import getLogger
-from scrapy import Request
-from w3lib.url import canonicalize_url
+from time import perf_counter
+from scrapy import Request, signals
+from scrapy.exceptions import DontCloseSpider, IgnoreRequest
+from scrapy.utils.spider import iterate_spider_output
+from ..metrics import StageTimer
+from ..persistence import CrawlIndex
+from ..utils import iter_unique, import_python
+from .utils import interleave_domains, canonicalize_url
 
 
 class TauSpiderMixin:
@@ -12,9 +19,34 @@ class TauSpiderMixin:
     item_loader = None
 
     _logger = None
+    _stage_timer = False
+    _crawl_index = False
+    _frontier = False
+    _frontier_acks = ()
 
     rules = ()
 
+    # Per-stage timing of `parse_item`.
+    # Uses `TAUKIT_TIMING` setting if `None`.
+    timing = None
+
+    # Round-robin interleaving of start requests by domain.
+    # Uses `TAUKIT_INTERLEAVE_DOMAINS` setting if `None`.
+    interleave = None
+
+    # Dropping of start urls with duplicated canonical forms.
+    # Uses `TAUKIT_DEDUP_START_URLS` setting if `None`.
+    dedup_start_urls = None
+
+    # Path of the crawl index for incremental crawling.
+    # Uses `TAUKIT_CRAWL_INDEX` setting if `None`.
+    crawl_index_path = None
+
+    # Shared frontier class (or its python path) and its keyword arguments.
+    # Use `TAUKIT_FRONTIER` and `TAUKIT_FRONTIER_KWDS` settings if `None`.
+    frontier_cls = None
+    frontier_kwds = None
+
     # Spider-level scrapy settings
     custom_settings = {}
 
@@ -27,6 +59,91 @@ class TauSpiderMixin:
             self._logger = getLogger('scrapy.spider.'+self.name)
         return self._logger
 
+    @property
+    def stage_timer(self):
+        """Stage timer of :py:meth:`parse_item` or ``None`` if timing is disabled.
+
+        Timing is enabled with ``timing`` attribute
+        or ``TAUKIT_TIMING`` setting.
+        """
+        if self._stage_timer is False:
+            timing = self.timing
+            if timing is None:
+                settings = getattr(self, 'settings', None)
+                timing = settings.getbool('TAUKIT_TIMING') if settings else False
+            self._stage_timer = StageTimer() if timing else None
+        return self._stage_timer
+
+    @property
+    def crawl_index(self):
+        """Crawl index or ``None`` if incremental crawling is disabled.
+
+        Incremental crawling is enabled with `crawl_index_path` attribute
+        or ``TAUKIT_CRAWL_INDEX`` setting. The path may contain ``{name}``
+        placeholder for the spider name.
+        See :py:meth:`make_request` and :py:meth:`is_unchanged`.
+        """
+        if self._crawl_index is False:
+            path = self.crawl_index_path
+            if path is None:
+                settings = getattr(self, 'settings', None)
+                path = settings.get('TAUKIT_CRAWL_INDEX') if settings else None
+            self._crawl_index = CrawlIndex(path.format(name=self.name)) if path else None
+        return self._crawl_index
+
+    @property
+    def frontier(self):
+        """Shared frontier or ``None`` if it is not used.
+
+        Frontier (see :py:mod:`taukit.frontier`) is created from
+        `frontier_cls` and `frontier_kwds` attributes or ``TAUKIT_FRONTIER``
+        and ``TAUKIT_FRONTIER_KWDS`` settings. URLs are leased
+        and acknowledged in batches of ``TAUKIT_FRONTIER_BATCH_SIZE``
+        (defaults to 100). When a frontier is used, then:
+
+        * start URLs are enqueued in the frontier and requests
+          are made only for URLs leased by the spider,
+        * more URLs are leased when the spider gets idle and it is kept open
+          as long as there are pending URLs in the frontier,
+        * URLs are acknowledged only when their callbacks finish
+          and all items yielded by the callbacks are scraped or dropped
+          by item pipelines, so URLs of crashed workers, failed callbacks
+          and items failing in pipelines are leased again
+          when their leases expire (at-least-once processing),
+        * requests ignored by middlewares (e.g. offsite or HTTP error
+          responses) are acknowledged and other download errors keep
+          their leases (see :py:meth:`frontier_errback`
+          and :py:meth:`frontier_ack` for custom errbacks).
+
+        Note that the spider is kept open until leases of its failed URLs
+        expire and the URLs are leased again.
+
+        Discovered links may be enqueued with ``self.frontier.enqueue()``
+        instead of being requested directly, so they are distributed
+        between all spider processes sharing the frontier.
+        """
+        if self._frontier is False:
+            settings = getattr(self, 'settings', None)
+            frontier_cls = self.frontier_cls
+            kwds = self.frontier_kwds
+            if frontier_cls is None and settings:
+                frontier_cls = settings.get('TAUKIT_FRONTIER')
+                kwds = settings.getdict('TAUKIT_FRONTIER_KWDS')
+            if frontier_cls:
+                if isinstance(frontier_cls, str):
+                    frontier_cls = import_python(frontier_cls)
+                self._frontier = frontier_cls(**(kwds or {}))
+                self._frontier_acks = []
+            else:
+                self._frontier = None
+        return self._frontier
+
+    @property
+    def frontier_batch_size(self):
+        """Number of URLs leased and acknowledged at once."""
+        settings = getattr(self, 'settings', None)
+        return settings.getint('TAUKIT_FRONTIER_BATCH_SIZE', 100) if settings else 100
+
     def get_start_urls(self):
         """Get start urls."""
         if not self.start_urls:
@@ -40,32 +157,333 @@ class TauSpiderMixin:
             urls = [ (self.test_url, { 'url': self.test_url }) ]
         else:
             urls = self.get_urls()
+        frontier = self.frontier
+        if frontier is not None:
+            self._connect_frontier()
+            batch = []
         n = 0
-        for url in urls:
+        for url, priority in self.iter_start_urls(urls):
             data = {'url': url}
             n += 1
             if self.args.limit and n > self.args.limit:
                 break
-            request = self.make_request(url, meta={ 'data': data })
+            if frontier is not None:
+                batch.append((url, priority))
+                if len(batch) >= self.frontier_batch_size:
+                    frontier.enqueue(batch)
+                    batch = []
+                    yield from self.lease_requests()
+                continue
+            request = self.make_request(url, meta={ 'data': data }, priority=priority)
             yield request
+        if frontier is not None:
+            frontier.enqueue(batch)
+            yield from self.lease_requests()
+
+    def iter_start_urls(self, urls):
+        """Iterate over start urls with request priorities.
+
+        URLs with duplicated canonical forms are dropped
+        if it is enabled with `dedup_start_urls` attribute
+        or ``TAUKIT_DEDUP_START_URLS`` setting.
+        URLs are interleaved by domain
+        (see :py:func:`taukit.webscraping.utils.interleave_domains`)
+        if it is enabled with `interleave` attribute
+        or ``TAUKIT_INTERLEAVE_DOMAINS`` setting.
+        Per-domain buffer size is set with ``TAUKIT_INTERLEAVE_BUFFER_SIZE``
+        (defaults to 100, no limit if 0) and total buffer size
+        with ``TAUKIT_INTERLEAVE_MAX_BUFFERED`` (no limit by default).
+        If ``TAUKIT_INTERLEAVE_PRIORITY`` is set,
+        then requests get priorities decreasing with their ranks
+        within domains, so the scheduler keeps them interleaved.
+
+        Yields
+        ------
+        tuple
+            Pairs of an URL and a request priority.
+        """
+        settings = getattr(self, 'settings', None)
+        dedup = self.dedup_start_urls
+        if dedup is None:
+            dedup = settings.getbool('TAUKIT_DEDUP_START_URLS') if settings else False
+        if dedup:
+            urls = iter_unique(urls, key=canonicalize_url)
+        interleave = self.interleave
+        if interleave is None:
+            interleave = settings.getbool('TAUKIT_INTERLEAVE_DOMAINS') if settings else False
+        if not interleave:
+            for url in urls:
+                yield url, 0
+            return
+        buffer_size = settings.getint('TAUKIT_INTERLEAVE_BUFFER_SIZE', 100) if settings else 100
+        max_buffered = settings.getint('TAUKIT_INTERLEAVE_MAX_BUFFERED') if settings else 0
+        priority = settings.getbool('TAUKIT_INTERLEAVE_PRIORITY') if settings else False
+        for url, rank in interleave_domains(urls, buffer_size=buffer_size or None,
+                                            max_buffered=max_buffered or None):
+            yield url, -rank if priority else 0
 
     def parse_extra_args(self):
         pass
 
     def make_request(self, url, **kwds):
-        """Make a request object."""
+        """Make a request object.
+
+        In incremental mode conditional headers are added
+        for pages known from previous crawls and ``304`` responses
+        are passed to callbacks.
+
+        When a frontier is used, then the URL is stored in ``frontier_url``
+        meta key and the callback is wrapped, so the URL is acknowledged
+        when the response and its items are processed (see :py:attr:`frontier`).
+        :py:meth:`frontier_errback` is used if no errback is given.
+        """
+        if self.frontier is not None:
+            callback = kwds.pop('callback', None)
+            if callback is not None and getattr(callback, '__self__', None) is self:
+                callback = callback.__name__
+            kwds['meta'] = {
+                'frontier_url': url,
+                'frontier_callback': callback,
+                **(kwds.get('meta') or {})
+            }
+            kwds['callback'] = self._frontier_callback
+            kwds.setdefault('errback', self.frontier_errback)
+        index = self.crawl_index
+        if index is not None:
+            headers = index.conditional_headers(canonicalize_url(url))
+            if headers:
+                kwds['headers'] = { **headers, **(kwds.get('headers') or {}) }
+                meta = kwds['meta'] = dict(kwds.get('meta') or {})
+                meta['handle_httpstatus_list'] = \
+                    [ *meta.get('handle_httpstatus_list', []), 304 ]
         return Request(url, **kwds)
 
+    def lease_requests(self, n=None):
+        """Make requests for URLs leased from the frontier.
+
+        Parameters
+        ----------
+        n : int or None
+            Maximum number of URLs.
+            Use :py:attr:`frontier_batch_size` if ``None``.
+        """
+        for url in self.frontier.lease(n or self.frontier_batch_size):
+            yield self.make_request(url, meta={ 'data': {'url': url} }, dont_filter=True)
+
+    def frontier_ack(self, request):
+        """Acknowledge URL of a request leased from the frontier."""
+        url = request.meta.get('frontier_url')
+        if url is None or self.frontier is None:
+            return
+        self._frontier_acks.append(url)
+        if len(self._frontier_acks) >= self.frontier_batch_size:
+            self._flush_frontier_acks()
+
+    def frontier_errback(self, failure):
+        """Log a failure of a request leased from the frontier.
+
+        URLs of requests ignored by middlewares (including HTTP error
+        responses) are acknowledged, since processing them again
+        would give the same result. Other failures keep the lease,
+        so the URL is leased again when the lease expires.
+        """
+        request = getattr(failure, 'request', None)
+        if request is not None and failure.check(IgnoreRequest):
+            self.frontier_ack(request)
+        self.logger.error(repr(failure))
+
+    def _frontier_callback(self, response, **kwds):
+        meta = response.meta
+        callback = meta.get('frontier_callback')
+        if callback is None:
+            callback = self.parse   # pylint: disable=no-member
+        elif isinstance(callback, str):
+            callback = getattr(self, callback)
+        state = meta['frontier_state'] = {
+            'items': 0, 'done': False, 'failed': False, 'acked': False
+        }
+        for obj in iterate_spider_output(callback(response, **kwds)):
+            if not isinstance(obj, Request):
+                state['items'] += 1
+            yield obj
+        state['done'] = True
+        self._maybe_frontier_ack(response)
+
+    def _maybe_frontier_ack(self, response):
+        state = response.meta['frontier_state']
+        if state['done'] and not state['items'] and not (state['failed'] or state['acked']):
+            state['acked'] = True
+            self.frontier_ack(response.request)
+
+    def _get_frontier_state(self, response, spider):
+        if spider is not self or response is None or response.request is None:
+            return None
+        return response.meta.get('frontier_state')
+
+    def _flush_frontier_acks(self):
+        if self._frontier_acks:
+            self.frontier.ack(self._frontier_acks)
+            self._frontier_acks = []
+
+    def _connect_frontier(self):
+        crawler = getattr(self, 'crawler', None)
+        if crawler is not None:
+            crawler.signals.connect(self._on_item_done, signal=signals.item_scraped)
+            crawler.signals.connect(self._on_item_done, signal=signals.item_dropped)
+            crawler.signals.connect(self._on_item_error, signal=signals.item_error)
+            crawler.signals.connect(self._on_spider_idle, signal=signals.spider_idle)
+
+    def _on_item_done(self, item, response, spider, **kwds):
+        state = self._get_frontier_state(response, spider)
+        if state is not None:
+            state['items'] -= 1
+            self._maybe_frontier_ack(response)
+
+    def _on_item_error(self, item, response, spider, failure):
+        state = self._get_frontier_state(response, spider)
+        if state is not None:
+            state['failed'] = True
+
+    def _on_spider_idle(self, spider):
+        if spider is not self:
+            return
+        self._flush_frontier_acks()
+        requests = list(self.lease_requests())
+        for request in requests:
+            self.crawler.engine.crawl(request, self)
+        if requests or self.frontier.has_pending():
+            raise DontCloseSpider
+
+    def is_unchanged(self, response):
+        """Check if a page has not changed since the previous crawl.
+
+        Pages are indexed by canonical requested URLs (before redirects).
+        Numbers of unchanged pages are recorded by the stats collector
+        as ``incremental/not_modified`` (``304`` responses)
+        and ``incremental/unchanged`` (same body digest).
+        Validators of unchanged pages are updated in the crawl index.
+        Changed pages are indexed only by :py:meth:`mark_crawled`,
+        which should be called when a page is processed successfully,
+        so pages failing to be processed are processed again in the next crawl.
+        Always ``False`` if incremental crawling is disabled.
+        """
+        index = self.crawl_index
+        if index is None:
+            return False
+        if response.status == 304:
+            self._inc_stats('incremental/not_modified')
+            return True
+        url = self._get_index_url(response)
+        digest = index.digest(response.body)
+        record = index.get(url)
+        if record is not None and record['digest'] == digest:
+            self._update_index(index, url, response, digest)
+            self._inc_stats('incremental/unchanged')
+            return True
+        return False
+
+    def mark_crawled(self, response):
+        """Update the crawl index with validators and body digest of a response.
+
+        Nothing is done for ``304`` responses
+        or if incremental crawling is disabled.
+        """
+        index = self.crawl_index
+        if index is None or response.status == 304:
+            return
+        url = self._get_index_url(response)
+        self._update_index(index, url, response, index.digest(response.body))
+
+    @staticmethod
+    def _get_index_url(response):
+        redirect_urls = response.meta.get('redirect_urls') if response.request else None
+        return canonicalize_url(redirect_urls[0] if redirect_urls else response.url)
+
+    @staticmethod
+    def _update_index(index, url, response, digest):
+        headers = response.headers
+        index.update(
+            url,
+            etag=(headers.get('ETag') or b'').decode('latin-1') or None,
+            last_modified=(headers.get('Last-Modified') or b'').decode('latin-1') or None,
+            digest=digest
+        )
+
+    def _inc_stats(self, key):
+        crawler = getattr(self, 'crawler', None)
+        if crawler is not None and crawler.stats is not None:
+            crawler.stats.inc_value(key, spider=self)
+
     def parse_item(self, response, item_loader=None):
-        """Default item parsing method."""
+        """Default item parsing method.
+
+        Returns ``None`` for pages which have not changed
+        since the previous crawl in incremental mode (see :py:meth:`is_unchanged`).
+        Pages are marked as crawled (see :py:meth:`mark_crawled`)
+        only after their items are loaded.
+        """
         if not getattr(self, 'item_loader', None):
             cn = self.__class__.__name__
             raise AttributeError(f"'{cn}' must define 'item_loader' class attribute")
+        if self.is_unchanged(response):
+            return None
         data = response.meta.get('data', {})
-        data['final_url'] = canonicalize_url(response.url)
         item_loader = item_loader if item_loader else self.item_loader
-        loader = self.item_loader(response=response) # pylint: disable=not-callable
+        timer = self.stage_timer
+        if timer is not None:
+            item = self._parse_item_timed(response, data, item_loader, timer)
+        else:
+            data['final_url'] = canonicalize_url(response.url)
+            loader = item_loader(response=response) # pylint: disable=not-callable
+            loader.add_data(data)
+            loader.setup()
+            item = loader.load_item()
+        self.mark_crawled(response)
+        return item
+
+    def _parse_item_timed(self, response, data, item_loader, timer):
+        t0 = perf_counter()
+        data['final_url'] = canonicalize_url(response.url)
+        t1 = perf_counter()
+        loader = item_loader(response=response)
+        t2 = perf_counter()
         loader.add_data(data)
+        t3 = perf_counter()
         loader.setup()
+        t4 = perf_counter()
         item = loader.load_item()
+        t5 = perf_counter()
+        timer.record(item_loader.__name__, (
+            ('canonicalize', t1 - t0),
+            ('loader', t2 - t1),
+            ('add_data', t3 - t2),
+            ('setup', t4 - t3),
+            ('load_item', t5 - t4),
+            ('total', t5 - t0)
+        ))
         return item
+
+    def closed(self, reason):
+        """Close crawl index and frontier, publish timing stats and export timing summary.
+
+        Summary is written as JSON to ``TAUKIT_TIMING_EXPORT`` path
+        (formatted with ``name`` of the spider) if the setting is defined.
+        """
+        if isinstance(self._crawl_index, CrawlIndex):
+            self._crawl_index.close()
+        if self._frontier:
+            self._flush_frontier_acks()
+            self._frontier.close()
+        timer = self.stage_timer
+        if timer is None or not timer.histograms:
+            return
+        crawler = getattr(self, 'crawler', None)
+        if crawler is not None and crawler.stats is not None:
+            timer.publish(crawler.stats, prefix=f'timing/{self.name}')
+        path = self.settings.get('TAUKIT_TIMING_EXPORT') \
+            if getattr(self, 'settings', None) else None
+        if path:
+            path = path.format(name=self.name)
+            with open(path, 'w') as stream:
+                json.dump(timer.as_dict(), stream, indent=2)
+            self.logger.info("Timing summary exported to '%s'", path)
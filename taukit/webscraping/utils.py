@@ -4,23 +4,44 @@ This module also contain processors that for sake of avoiding circular imports
 can not be placed in `misc.processors`.
 """
 import re
+import os
+from collections import OrderedDict, deque
+from functools import lru_cache
+from urllib.parse import urlsplit
 from scrapy.http import HtmlResponse
 from w3lib.html import remove_tags, remove_comments, strip_html5_whitespace
 from w3lib.html import replace_entities, replace_escape_chars, replace_tags
+from w3lib.url import canonicalize_url as _canonicalize_url
 import tldextract as tld
+from ..utils import iter_unique
+from ..persistence import ResponseArchivePersister
 
 _rx_web_sectionize = re.compile(r"\n|\s\s+|\t")
+# URLs which are left intact by `w3lib.url.canonicalize_url`
+# provided that their query arguments are sorted
+_rx_canonical_url = re.compile(
+    r"^https?://[a-z0-9.-]+(?::\d+)?/[\w.~/-]*"
+    r"(?:\?([\w.-]+=[\w.-]*(?:&[\w.-]+=[\w.-]*)*))?$",
+    re.ASCII
+)
 
 
+@lru_cache(maxsize=4096)
+def _get_host_domain(host):
+    return '.'.join([ p for p in tld.extract(host)[-2:] if p ])
+
 def get_url_domain(url):
     """Get domain from an URL.
 
+    Domains are cached by network locations,
+    so public suffix lookups are done once per host.
+
     Parameters
     ----------
     url : str
         URL.
     """
-    return '.'.join([ p for p in tld.extract(url)[-2:] if p ])
+    return _get_host_domain(urlsplit(url).netloc or url)
 
 def is_url_in_domains(url, domains):
     """Check if URL is in domain(s).
@@ -38,6 +59,121 @@ def is_url_in_domains(url, domains):
         domains = [ domains ]
     return get_url_domain(url) in domains
 
+@lru_cache(maxsize=1 << 14)
+def canonicalize_url(url, **kwds):
+    """Canonicalize URL.
+
+    It is a drop-in replacement of :py:func:`w3lib.url.canonicalize_url`
+    with the same results. Results are cached in a bounded LRU cache
+    and URLs which are already canonical (i.e. with a lower-case host,
+    safe characters in the path and sorted query arguments)
+    are recognized without parsing.
+
+    Parameters
+    ----------
+    url : str
+        URL.
+    **kwds :
+        Passed to :py:func:`w3lib.url.canonicalize_url`.
+    """
+    if not kwds and isinstance(url, str):
+        m = _rx_canonical_url.match(url)
+        if m:
+            query = m.group(1)
+            if not query:
+                return url
+            pairs = [ tuple(p.split('=', 1)) for p in query.split('&') ]
+            if all(a <= b for a, b in zip(pairs, pairs[1:])):
+                return url
+    return _canonicalize_url(url, **kwds)
+
+def canonicalize_urls(urls, unique=False, maxsize=None, **kwds):
+    """Canonicalize many URLs.
+
+    Parameters
+    ----------
+    urls : iterable of str
+        URLs.
+    unique : bool
+        Should duplicated canonical URLs be dropped.
+    maxsize : int or None
+        Number of most recently seen canonical URLs to remember
+        when dropping duplicates (see :py:func:`taukit.utils.iter_unique`).
+    **kwds :
+        Passed to :py:func:`canonicalize_url`.
+
+    Yields
+    ------
+    str
+        Canonical URLs.
+    """
+    urls = ( canonicalize_url(url, **kwds) for url in urls )
+    if unique:
+        urls = iter_unique(urls, maxsize=maxsize)
+    yield from urls
+
+def interleave_domains(urls, buffer_size=100, max_buffered=None, key=None):
+    """Interleave URLs from different domains.
+
+    URLs are buffered per domain and yielded round-robin across domains,
+    so consecutive requests go to different domains as much as possible.
+    Input is consumed lazily. A round over all buffered domains
+    (one URL per domain) is yielded whenever a domain buffer gets full
+    or the total number of buffered URLs exceeds `max_buffered`,
+    so memory stays bounded.
+
+    URLs can be interleaved only within the buffers. When a domain
+    has more consecutive URLs in the input (i.e. in a feed sorted by domain)
+    than `buffer_size`, its buffer gets full before other domains
+    are seen and its URLs are yielded in the input order until
+    other domains show up. For such inputs it is better to disable
+    per-domain limit (``buffer_size=None``) and bound only
+    the total number of buffered URLs with `max_buffered`,
+    so the whole budget may be used by long runs of one domain.
+
+    Parameters
+    ----------
+    urls : iterable
+        URLs or other objects from which URLs are extracted with `key`.
+    buffer_size : int or None
+        Maximum number of buffered URLs per domain. No limit if ``None``.
+    max_buffered : int or None
+        Maximum total number of buffered URLs. No limit if ``None``.
+    key : callable or None
+        Function mapping objects to URLs. Objects are URLs if ``None``.
+
+    Yields
+    ------
+    tuple
+        Pairs of an object and its zero-based rank within its domain.
+        Negated ranks may be used as request priorities,
+        so scheduler keeps interleaving URLs when reordering requests.
+    """
+    buckets = OrderedDict()
+    ranks = {}
+    n_buffered = 0
+    def emit_round():
+        nonlocal n_buffered
+        for domain, bucket in list(buckets.items()):
+            rank = ranks.get(domain, 0)
+            ranks[domain] = rank + 1
+            n_buffered -= 1
+            yield bucket.popleft(), rank
+            if not bucket:
+                del buckets[domain]
+    for obj in urls:
+        domain = get_url_domain(key(obj) if key else obj)
+        bucket = buckets.get(domain)
+        if bucket is None:
+            bucket = buckets[domain] = deque()
+        bucket.append(obj)
+        n_buffered += 1
+        while (buffer_size is not None and len(bucket) >= buffer_size) \
+        or (max_buffered is not None and n_buffered > max_buffered):
+            yield from emit_round()
+    while buckets:
+        yield from emit_round()
+
 def normalize_web_content(x, keep=('h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'strong'),
                           token='____SECTION____'):
     """Normalize web content.
@@ -65,7 +201,7 @@ def normalize_web_content(x, keep=('h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'strong')
             yield part
 
 def load_item(body, item_loader, item=None, url='placeholder_url',
-              callback=None, encoding='utf-8'):
+              callback=None, encoding='utf-8', headers=None):
     """Load item from HTML string.
 
     Parameters
@@ -85,15 +221,18 @@ def load_item(body, item_loader, item=None, url='placeholder_url',
         but only modify the state of the loader.
         This meant mostly to use additional setup methods
         defined on a given item loader class.
-    encoding : str
+    encoding : str or None
         Response encoding. Defaults to UTF-8.
+        If `None` then it is detected from headers and the body.
+    headers : dict or None
+        Optional response headers.
 
     Returns
     -------
     scrapy.Item
         Item object populated with data extracted from an HTML markup.
     """
-    response = HtmlResponse(url=url, body=body, encoding=encoding)
+    response = HtmlResponse(url=url, body=body, encoding=encoding, headers=headers)
     if item:
         loader = item_loader(item=item(), response=response)
     else:
@@ -104,6 +243,33 @@ def load_item(body, item_loader, item=None, url='placeholder_url',
     item = loader.load_item()
     return item
 
+def load_archived_items(archive, item_loader, **kwds):
+    """Load items from archived responses.
+
+    Parameters
+    ----------
+    archive : str or taukit.persistence.ResponseArchivePersister
+        Archive file path or persister.
+    item_loader : BaseItemLoader
+        Item loader class sublassing the `BaseItemLoader` defined in `items.py`.
+    **kwds :
+        Other arguments passed to :py:func:`load_item`.
+
+    Yields
+    ------
+    scrapy.Item
+        Items loaded from archived responses in the order of archiving.
+    """
+    if isinstance(archive, str):
+        records = ResponseArchivePersister(os.path.basename(archive),
+                                           os.path.dirname(archive)).load(archive)
+    else:
+        records = archive.load()
+    kwds = { 'encoding': None, **kwds }
+    for record in records:
+        yield load_item(record['body'], item_loader, url=record['url'],
+                        headers=record['headers'], **kwds)
+
 def sectionize(parts, first_is_heading=False):
     """Join parts of the text after splitting into sections with headings.
 
@@ -0,0 +1,34 @@
+"""Benchmarks for decorators."""
+import pytest
+from taukit.base.decorators import interface
+
+
+@interface({
+    'x': {'type': 'string'},
+    'y': {'type': 'integer'}
+})
+def typed(x, y):
+    return x, y
+
+@interface({
+    'x': {'type': 'string'},
+    'y': {'type': 'integer', 'coerce': int}
+})
+def coerced(x, y):
+    return x, y
+
+def plain(x, y):
+    return x, y
+
+
+@pytest.mark.benchmark(group='interface')
+class BenchmarkInterface:
+
+    def benchmark_plain(self, benchmark):
+        benchmark(plain, 'a', 1)
+
+    def benchmark_type_determined(self, benchmark):
+        benchmark(typed, 'a', y=1)
+
+    def benchmark_coerced(self, benchmark):
+        benchmark(coerced, 'a', y='1')
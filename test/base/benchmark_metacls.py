@@ -0,0 +1,62 @@
+"""Benchmarks for metaclasses."""
+# pylint: disable=W0212,E1101
+import pytest
+from taukit.base.metacls import Composable
+
+
+class Component:
+
+    def __init__(self, prefix, n_attrs=20):
+        for i in range(n_attrs):
+            setattr(self, f'{prefix}{i}', i)
+
+
+class Host(metaclass=Composable):
+
+    __components = [
+        (f'component{i}', Component(f'a{i}_')) for i in range(5)
+    ]
+
+    def __init__(self):
+        self._setcomponents([
+            (f'instance_component{i}', Component(f'b{i}_')) for i in range(5)
+        ])
+
+
+def _setattribute_scan(self, attr, value):
+    """Component scan used by `_setattribute` before attribute owner indexes."""
+    components = \
+        [ *(getattr(self, '__components') if '__components' in dir(self) else {}).items() ]
+    bases = (self.__class__, *self.__class__.__bases__)
+    for base in bases:
+        components_attr = '_'+base.__name__+'__components'
+        components = [ *components, *getattr(base, components_attr, {}).items() ]
+    for _, component in components:
+        if hasattr(component, attr):
+            setattr(component, attr, value)
+            return
+    raise AttributeError(f"No component with '{attr}' attribute was found")
+
+
+@pytest.mark.benchmark(group='composable-setattribute')
+class BenchmarkSetattribute:
+
+    def benchmark_indexed(self, benchmark):
+        host = Host()
+        benchmark(host._setattribute, 'a4_19', 1)
+
+    def benchmark_scan(self, benchmark):
+        host = Host()
+        benchmark(_setattribute_scan, host, 'a4_19', 1)
+
+
+@pytest.mark.benchmark(group='composable-getattr')
+class BenchmarkGetattr:
+
+    def benchmark_instance_component(self, benchmark):
+        host = Host()
+        benchmark(getattr, host, 'b4_19')
+
+    def benchmark_class_component(self, benchmark):
+        host = Host()
+        benchmark(getattr, host, 'a4_19')
@@ -58,3 +58,30 @@ def test_interface_cls(x, y, expected):
     b = B(x, y)
     assert (a.x, a.y) == expected
     assert (b.x, b.y) == expected
+
+@pytest.mark.parametrize('skip_validation', [True, False])
+def test_interface_skip_validation(skip_validation):
+    @interface({
+        'x': {'type': 'string', 'empty': False},
+        'y': {'type': 'integer', 'coerce': int}
+    }, skip_validation=skip_validation)
+    def func(x, y=0):
+        return x, y
+    with pytest.raises(ValueError):
+        func('', '1')
+    assert func('a', '1') == ('a', 1)
+    if skip_validation:
+        assert func('', '2') == ('', 2)
+    else:
+        with pytest.raises(ValueError):
+            func('', '2')
+    with pytest.raises(ValueError):
+        func('a', 'b')
+
+def test_interface_type_cache(monkeypatch):
+    monkeypatch.setenv('TAUKIT_SKIP_INTERFACE_VALIDATION', '1')
+    func = interface({'x': {'type': 'integer'}})(lambda x: x)
+    assert func(1) == 1
+    assert func(2) == 2
+    with pytest.raises(ValueError):
+        func('a')
@@ -36,6 +36,35 @@ class SomeClass(ParentClass, metaclass=Composable):
             ('rx', re.compile(pattern, re.IGNORECASE))
         ])
 
+class ChildClass(SomeClass, metaclass=Composable):
+
+    def __init__(self, x):
+        self._setcomponents([
+            ('somez', Something(x))
+        ])
+
+class DelegatingClass(metaclass=Composable, delegate=True):
+
+    __components = [
+        ('regex', re.compile(r"foo", re.IGNORECASE)),
+        ('some', Something(10))
+    ]
+
+    def __init__(self, pattern=None):
+        if pattern:
+            self._setcomponents([
+                ('rx', re.compile(pattern, re.IGNORECASE))
+            ])
+
+    def meth(self):
+        return 'own'
+
+class DelegatingChildClass(DelegatingClass, metaclass=Composable):
+
+    __components = [
+        ('other', Something(20))
+    ]
+
 @pytest.fixture
 def some_instance():
     return SomeClass(r"bar")
@@ -92,3 +121,82 @@ class TestComposable:
         x1 = some_instance.x
         x2 = some_instance._getattribute('x', 'somex', 'ParentClass')
         assert x1 == x2
+
+    def test_mro_components(self):
+        """Test case for components defined in indirect base classes."""
+        instance = ChildClass(20)
+        assert instance.x == 20
+        assert instance.search("foo") is not None
+        assert instance.somex is instance._getcomponent('somex', 'ParentClass')
+
+    def test_setcomponents_cache(self, some_instance):
+        """Test case for cache invalidation in `_setcomponents`."""
+        assert some_instance.x == some_instance.somex.x
+        some_instance._setcomponents([
+            ('somey', Something(5))
+        ])
+        assert some_instance.x == 5
+        assert some_instance.search("foo") is not None
+
+    def test_delegate(self):
+        """Test case for delegation descriptors."""
+        assert 'search' in vars(DelegatingClass)
+        assert 'x' in vars(DelegatingClass)
+        assert DelegatingClass().search("foo") is not None
+        assert DelegatingClass().meth() == 'own'
+        assert DelegatingClass().x == 10
+        instance = DelegatingClass(r"bar")
+        assert instance.search("foo") is None
+        assert instance.search("bar") is not None
+        instance = DelegatingChildClass()
+        assert instance.x == 20
+        assert instance.search("foo") is not None
+        instance.x = 30
+        assert instance.x == 30
+        assert instance.other.x == 20
+
+    def test_attribute_index(self):
+        """Test case for attribute owner index."""
+        instance = ParentClass(5)
+        assert instance._getattribute('x') == 5
+        instance._setattribute('x', 6)
+        assert instance.somey.x == 6
+        instance._setattribute('x', 7, on_component='somex')
+        assert instance._getattribute('x', 'somex', 'ParentClass') == 7
+        instance.somey.y = 1
+        assert instance._getattribute('y') == 1
+        with pytest.raises(AttributeError):
+            instance._setattribute('z', 1)
+        with pytest.raises(AttributeError):
+            instance._setattribute('x', 1, on_component='nonexistent')
+
+    def test_attribute_index_precedence(self):
+        """Test case for index updates when earlier components gain attributes."""
+        instance = ParentClass(5)
+        instance._setcomponents([
+            ('first', Something(1)),
+            ('second', Something(2))
+        ])
+        instance.second.v = 2
+        assert instance.v == 2
+        instance._setattribute('v', 1, on_component='first')
+        assert instance.v == 1
+        instance.second.w = 2
+        assert instance.w == 2
+        instance.first.w = 1
+        assert instance.w == 2
+        instance._reindex()
+        assert instance.w == 1
+
+    def test_slots(self):
+        """Test case for hosts with ``__slots__``."""
+        class SlotsClass(metaclass=Composable):
+            __slots__ = ()
+            __components = [
+                ('some', Something(10))
+            ]
+        instance = SlotsClass()
+        assert instance.x == 10
+        assert instance._getattribute('x') == 10
+        with pytest.raises(AttributeError):
+            getattr(instance, 'nonexistent')
@@ -0,0 +1,114 @@
+"""Unit tests for validators."""
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from taukit.base.validators import Validator, ValidatorPool
+
+
+SCHEMA = {
+    'x': {'type': 'string', 'coerce': str},
+    'y': {'type': 'integer', 'coerce': [int, abs], 'default': 1},
+    'z': {'type': ['list', 'mapping'], 'nullable': True, 'empty': False},
+    'w': {}
+}
+
+
+class TestCompiledSchema:
+
+    @pytest.mark.parametrize('kwds', [
+        {},
+        {'allow_unknown': False},
+        {'allow_unknown': False, 'purge_unknown': True}
+    ])
+    @pytest.mark.parametrize('document', [
+        {'x': 1, 'y': '-2', 'z': [1], 'w': 'a'},
+        {'x': 'a', 'y': None, 'z': None},
+        {'x': 'a', 'u': 10},
+        {'x': 'a', 'y': 'b'},
+        {'x': 'a', 'z': []},
+        {'x': 'a', 'z': 'b'},
+        {'x': 'a', 'w': None},
+        {}
+    ])
+    def test_same_as_cerberus(self, document, kwds):
+        validator = Validator(SCHEMA, **kwds)
+        compiled = validator.compiled
+        assert compiled.is_compiled
+        cerberus = Validator(SCHEMA, **kwds)
+        assert compiled.normalized(document) == cerberus.normalized(document)
+        assert compiled.errors == cerberus.errors
+        assert compiled.validate(document) == cerberus.validate(document)
+        assert compiled.errors == cerberus.errors
+        assert compiled.validated(document) == cerberus.validated(document)
+        assert compiled.errors == cerberus.errors
+
+    def test_unsupported(self):
+        schema = { 'x': {'type': 'integer', 'min': 10} }
+        validator = Validator(schema)
+        compiled = validator.compiled
+        assert not compiled.is_compiled
+        assert compiled.validate({'x': 11})
+        assert not compiled.validate({'x': 9})
+        assert compiled.errors == {'x': ['min value is 10']}
+
+    def test_cache(self):
+        validator = Validator(SCHEMA)
+        compiled = validator.compiled
+        assert validator.compiled is compiled
+        validator.schema = { 'x': {'type': 'integer'} }
+        assert validator.compiled is not compiled
+        assert not validator.compiled.validate({'x': 'a'})
+
+
+class TestValidator:
+
+    records = [
+        {'x': 'a', 'y': 2},
+        {'x': 'b', 'y': 'c'},
+        {'x': 'c', 'z': []},
+        {'x': 'd', 'z': [1]}
+    ]
+
+    def test_validate_many(self):
+        validator = Validator(SCHEMA)
+        report = validator.validate_many(self.records)
+        assert sorted(report) == [1, 2]
+        cerberus = Validator(SCHEMA)
+        assert not cerberus.validate(self.records[1])
+        assert report[1] == cerberus.errors
+        assert report[2] == {'z': ['empty values not allowed']}
+        assert validator.validate_many(self.records[::3]) == {}
+
+    def test_normalized_many(self):
+        validator = Validator(SCHEMA)
+        documents, report = validator.normalized_many(self.records)
+        assert documents == [
+            {'x': 'a', 'y': 2},
+            None,
+            {'x': 'c', 'y': 1, 'z': []},
+            {'x': 'd', 'y': 1, 'z': [1]}
+        ]
+        assert list(report) == [1]
+
+
+class TestValidatorPool:
+
+    def test_get(self):
+        pool = ValidatorPool(SCHEMA, allow_unknown=False)
+        validator = pool.get()
+        assert pool.get() is validator
+        assert validator.schema is pool.schema
+        assert not validator.allow_unknown
+
+    def test_threads(self):
+        pool = ValidatorPool(SCHEMA)
+        def validate(i):
+            validator = pool.get()
+            document = {'x': str(i), 'y': i if i % 2 else 'a'}
+            return validator, validator.compiled.validated(document)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(validate, range(100)))
+        validators = { id(v) for v, _ in results }
+        assert len(validators) <= 4
+        assert all(v.schema is pool.schema for v, _ in results)
+        for i, (_, document) in enumerate(results):
+            assert document == ({'x': str(i), 'y': i} if i % 2 else None)
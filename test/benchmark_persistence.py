@@ -0,0 +1,22 @@
+"""Benchmarks for persisters."""
+from datetime import datetime
+import pytest
+from taukit.persistence import JSONLinesPersister
+
+RECORDS = [
+    {'id': i, 'created': datetime(2018, 1, 1), 'text': 'lorem ipsum ' * 10}
+    for i in range(1000)
+]
+
+
+@pytest.mark.benchmark(group='persistence')
+class BenchmarkJSONLinesPersister:
+
+    def benchmark_persist(self, benchmark, tmp_path):
+        persister = JSONLinesPersister('items-{n}.jsonl', str(tmp_path))
+        benchmark(persister.persist, RECORDS)
+
+    def benchmark_load(self, benchmark, tmp_path):
+        persister = JSONLinesPersister('items-{n}.jsonl', str(tmp_path))
+        persister.persist(RECORDS)
+        benchmark(lambda: list(persister.load()))
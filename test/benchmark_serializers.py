@@ -0,0 +1,27 @@
+"""Benchmarks for serializers."""
+import json
+from datetime import datetime
+import pytest
+from taukit.serializers import JSONEncoder, UniversalJSONEncoder
+
+RECORDS = [
+    {
+        'id': i,
+        'created': datetime(2018, 1, 1, 12, i % 60),
+        'tags': [ f'tag{j}' for j in range(5) ],
+        'meta': {'score': i / 3, 'valid': bool(i % 2)},
+        'obj': None
+    }
+    for i in range(1000)
+]
+
+
+@pytest.mark.benchmark(group='serializers')
+class BenchmarkJSONEncoder:
+
+    def benchmark_json_encoder(self, benchmark):
+        benchmark(json.dumps, RECORDS, cls=JSONEncoder)
+
+    def benchmark_universal_json_encoder(self, benchmark):
+        records = [ {**r, 'obj': object()} for r in RECORDS ]
+        benchmark(json.dumps, records, cls=UniversalJSONEncoder)
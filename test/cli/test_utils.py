@@ -0,0 +1,75 @@
+"""Unit tests for command-line interface utilities."""
+import json
+from io import BytesIO
+from datetime import datetime
+import pytest
+import click
+from click.testing import CliRunner
+from taukit.cli.utils import to_console, JSONLinesWriter, profile_option
+
+
+def test_to_console_unique(capsys):
+    to_console([1, 2, {'a': 1}, 1, {'a': 1}], unique=True, processor=lambda x: x)
+    out = capsys.readouterr().out
+    assert out.split('\n') == ['1', '2', '{', '  "a": 1', '}', '']
+
+def test_to_console_machine(capfd):
+    to_console([{'a': 1}, 'x', {'a': 1}], unique=True, machine=True)
+    out = capfd.readouterr().out
+    assert out.splitlines() == ['{"a":1}', '"x"']
+
+class BrokenStream(BytesIO):
+
+    def write(self, b):
+        raise BrokenPipeError
+
+
+class TestJSONLinesWriter:
+
+    @pytest.mark.parametrize('backend', ['json', None])
+    def test_write(self, backend):
+        stream = BytesIO()
+        with JSONLinesWriter(stream, backend=backend, flush_interval=None) as writer:
+            writer.write({'a': [1, 2], 'b': 'ż'})
+            writer.write('x')
+            writer.write(datetime(2018, 1, 1))
+        lines = stream.getvalue().decode('utf-8').splitlines()
+        assert [ json.loads(l) for l in lines ] == \
+            [{'a': [1, 2], 'b': 'ż'}, 'x', '2018-01-01T00:00:00']
+        assert lines[0] == '{"a":[1,2],"b":"ż"}'
+
+    def test_backends(self):
+        pytest.importorskip('orjson')
+        records = [{1: 'a', None: 2, 'b': [1.5, True]}, datetime(2018, 1, 1), 'ż']
+        outputs = []
+        for backend in ('json', 'orjson'):
+            stream = BytesIO()
+            with JSONLinesWriter(stream, backend=backend, flush_interval=None) as writer:
+                for record in records:
+                    writer.write(record)
+            outputs.append(stream.getvalue())
+        assert outputs[0] == outputs[1]
+        assert outputs[0].splitlines()[0] == b'{"1":"a","null":2,"b":[1.5,true]}'
+
+    def test_broken_pipe(self):
+        writer = JSONLinesWriter(BrokenStream())
+        with pytest.raises(BrokenPipeError):
+            writer.write(1)
+        writer.write(2)
+        writer.close()
+
+
+def test_profile_option(tmp_path):
+    @click.command()
+    @click.argument('n', type=int)
+    @profile_option
+    def command(n):
+        click.echo(sum(range(n)))
+    runner = CliRunner()
+    result = runner.invoke(command, ['10'], env={'TAUKIT_PROFILE': ''})
+    assert result.output == '45\n'
+    path = str(tmp_path / 'run')
+    result = runner.invoke(command, ['10', '--profile', path, '--profile-mode', 'cprofile'])
+    assert result.exit_code == 0
+    assert f"'{path}.pstats'" in result.output
+    assert (tmp_path / 'run.pstats').exists()
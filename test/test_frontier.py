@@ -0,0 +1,99 @@
+"""Test cases for crawl frontiers."""
+import sqlite3
+from urllib.error import HTTPError
+import pytest
+from taukit.frontier import SQLiteFrontier, HTTPFrontier, FrontierServer
+
+
+@pytest.fixture
+def frontier(tmp_path):
+    with SQLiteFrontier(str(tmp_path / 'frontier.db')) as frontier:
+        yield frontier
+
+
+class TestSQLiteFrontier:
+
+    def test_enqueue(self, frontier):
+        assert frontier.enqueue(['http://a.com', 'http://b.com']) == 2
+        assert frontier.enqueue(['http://a.com', ('http://c.com', 5)]) == 1
+        assert 'http://a.com' in frontier
+        assert 'http://d.com' not in frontier
+        assert frontier.pending() == 3
+
+    def test_lease_ack(self, frontier):
+        frontier.enqueue(['http://a.com', 'http://b.com', ('http://c.com', 5)])
+        assert frontier.lease(2, owner='w1') == ['http://c.com', 'http://a.com']
+        assert frontier.lease(2, owner='w2') == ['http://b.com']
+        assert frontier.lease(owner='w3') == []
+        assert frontier.ack(['http://a.com', 'http://c.com'], owner='w1') == 2
+        assert frontier.ack(['http://b.com'], owner='w1') == 0
+        assert frontier.pending() == 1
+        assert frontier.has_pending()
+        assert frontier.ack(['http://b.com'], owner='w2') == 1
+        assert frontier.pending() == 0
+        assert not frontier.has_pending()
+        assert frontier.enqueue(['http://a.com']) == 0
+
+    def test_lease_expired(self, tmp_path):
+        path = str(tmp_path / 'frontier.db')
+        with SQLiteFrontier(path, lease_ttl=0) as frontier:
+            frontier.enqueue(['http://a.com'])
+            assert frontier.lease(owner='w1') == ['http://a.com']
+        with SQLiteFrontier(path) as frontier:
+            frontier.enqueue([('http://b.com', -1)])
+            assert frontier.lease(2, owner='w2') == ['http://a.com', 'http://b.com']
+            assert frontier.lease(owner='w3') == []
+            assert frontier.ack(['http://a.com'], owner='w1') == 0
+            assert frontier.ack(['http://a.com'], owner='w2') == 1
+
+    def test_key(self, tmp_path):
+        path = str(tmp_path / 'frontier.db')
+        key = 'taukit.webscraping.utils:canonicalize_url'
+        with SQLiteFrontier(path, key=key) as frontier:
+            assert frontier.enqueue(['http://a.com/?x=1&y=2', 'http://A.com/?y=2&x=1']) == 1
+            frontier.lease()
+            assert frontier.ack(['http://a.com/?y=2&x=1']) == 1
+            assert frontier.pending() == 0
+
+
+def test_http_frontier(frontier):
+    with FrontierServer(frontier) as server:
+        client = HTTPFrontier(server.url)
+        assert client.enqueue([('http://a.com', 1), 'http://b.com']) == 2
+        assert client.seen('http://b.com')
+        assert client.lease(3) == ['http://a.com', 'http://b.com']
+        client.ack(['http://a.com'])
+        assert client.pending() == 1
+        assert client.has_pending()
+        assert frontier.pending() == 1
+
+
+def test_http_frontier_connections(frontier, monkeypatch):
+    connections = []
+    def connect(*args, **kwds):
+        conn = _connect(*args, **kwds)
+        connections.append(conn)
+        return conn
+    _connect = sqlite3.connect
+    monkeypatch.setattr(sqlite3, 'connect', connect)
+    with FrontierServer(frontier) as server:
+        client = HTTPFrontier(server.url)
+        client.enqueue(['http://a.com', 'http://b.com'])
+        client.lease()
+        assert client.pending() == 2
+    assert len(connections) == 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        connections[0].execute("SELECT 1")
+    assert frontier.pending() == 2
+
+
+def test_http_frontier_error(frontier, monkeypatch):
+    def pending():
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(frontier, 'pending', pending)
+    with FrontierServer(frontier) as server:
+        client = HTTPFrontier(server.url)
+        with pytest.raises(HTTPError) as excinfo:
+            client.pending()
+        assert excinfo.value.code == 500
+        assert client.enqueue(['http://a.com']) == 1
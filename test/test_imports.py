@@ -0,0 +1,37 @@
+"""Import time regression tests."""
+import os
+import sys
+import subprocess
+import pytest
+
+HEAVY_MODULES = ('scrapy', 'cerberus', 'twisted', 'tldextract')
+
+
+def get_imported_modules(statement):
+    """Get modules imported by a statement according to ``python -X importtime``."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = { **os.environ, 'PYTHONPATH': root }
+    proc = subprocess.run([ sys.executable, '-X', 'importtime', '-c', statement ],
+                          stderr=subprocess.PIPE, env=env, check=True)
+    modules = set()
+    for line in proc.stderr.decode().splitlines():
+        if line.startswith('import time:') and line.count('|') == 2:
+            modules.add(line.split('|')[-1].strip())
+    return modules
+
+
+@pytest.mark.parametrize('statement', [
+    'import taukit.cli.utils',
+    'import taukit.serializers',
+    'import taukit.base',
+    'import taukit.webscraping'
+])
+def test_no_heavy_imports(statement):
+    modules = get_imported_modules(statement)
+    assert modules
+    for module in modules:
+        assert module.split('.')[0] not in HEAVY_MODULES
+
+def test_lazy_attributes():
+    modules = get_imported_modules('from taukit.base import Validator')
+    assert 'cerberus' in modules
@@ -0,0 +1,109 @@
+"""Unit tests for metrics."""
+import json
+import pytest
+from taukit.metrics import Histogram, StageTimer, PersisterMetrics
+
+
+class TestHistogram:
+
+    def test_add(self):
+        hist = Histogram(start=1, factor=2, n_buckets=4)
+        assert hist.bounds == (1, 2, 4, 8)
+        assert hist.quantile(.5) is None
+        for value in (.5, 1.5, 3, 3, 100):
+            hist.add(value)
+        assert hist.counts == [1, 1, 2, 0, 1]
+        assert len(hist) == 5
+        assert hist.mean == pytest.approx(21.6)
+        assert (hist.min, hist.max) == (.5, 100)
+        assert hist.quantile(0) == 1
+        assert hist.quantile(.5) == 4
+        assert hist.quantile(1) == 100
+        summary = hist.as_dict()
+        assert summary['count'] == 5
+        assert summary['p50'] == 4
+        assert summary['p99'] == 100
+
+    def test_merge(self):
+        hist1 = Histogram(start=1, factor=2, n_buckets=4)
+        hist2 = Histogram(start=1, factor=2, n_buckets=4)
+        hist1.add(1)
+        hist2.add(10)
+        hist1.merge(hist2)
+        assert hist1.counts == [1, 0, 0, 0, 1]
+        assert (hist1.min, hist1.max, hist1.count) == (1, 10, 2)
+        with pytest.raises(ValueError):
+            hist1.merge(Histogram())
+
+
+class TestStageTimer:
+
+    def test_record(self):
+        timer = StageTimer()
+        timer.record('group', [('a', .001), ('b', .002)])
+        timer.record('group', [('a', .003)])
+        summary = timer.as_dict()
+        assert summary['group']['a']['count'] == 2
+        assert summary['group']['b']['count'] == 1
+        stats = {}
+        class Stats:
+            set_value = stats.__setitem__
+        timer.publish(Stats(), prefix='t')
+        assert stats['t/group/a/count'] == 2
+        assert stats['t/group/b/max'] == .002
+
+
+class TestPersisterMetrics:
+
+    def test_record(self):
+        metrics = PersisterMetrics()
+        metrics.record_batch(10, 100, .01, .02)
+        metrics.record_batch(5, 50, .01, .01)
+        metrics.set_queue_depth(7)
+        metrics.set_queue_depth(2)
+        summary = metrics.as_dict()
+        assert summary['items'] == 15
+        assert summary['bytes'] == 150
+        assert summary['batches'] == 2
+        assert summary['encode_time'] == pytest.approx(.02)
+        assert summary['write_time'] == pytest.approx(.03)
+        assert summary['flush_latency']['count'] == 2
+        assert (summary['queue_depth'], summary['max_queue_depth']) == (2, 7)
+
+    def test_to_prometheus(self):
+        metrics = PersisterMetrics(labels={'spider': 'foo'})
+        metrics.record_batch(10, 100, .01, .02)
+        text = metrics.to_prometheus()
+        assert '# TYPE taukit_persister_items_total counter' in text
+        assert 'taukit_persister_items_total{spider="foo"} 10' in text
+        assert 'taukit_persister_flush_seconds_bucket{spider="foo",le="+Inf"} 1' in text
+        assert 'taukit_persister_flush_seconds_count{spider="foo"} 1' in text
+
+    def test_to_prometheus_escape(self):
+        metrics = PersisterMetrics(labels={'path': 'C:\\x "y"\nz'})
+        text = metrics.to_prometheus()
+        assert 'taukit_persister_items_total{path="C:\\\\x \\"y\\"\\nz"} 0' in text
+
+    @pytest.mark.parametrize('filename,dump_format', [
+        ('metrics.json', 'json'),
+        ('metrics.prom', 'prometheus')
+    ])
+    def test_dump(self, tmp_path, filename, dump_format):
+        path = str(tmp_path / filename)
+        metrics = PersisterMetrics(dump_path=path, dump_interval=3600)
+        assert metrics.dump_format == dump_format
+        metrics.record_batch(1, 10, .01, .01)
+        assert not (tmp_path / filename).exists()
+        metrics.dump_interval = 0
+        metrics.record_batch(1, 10, .01, .01)
+        with open(path) as f:
+            data = f.read()
+        if dump_format == 'json':
+            assert json.loads(data)['items'] == 2
+        else:
+            assert data == metrics.to_prometheus()
+        assert list(tmp_path.iterdir()) == [ tmp_path / filename ]
+
+    def test_bad_format(self):
+        with pytest.raises(ValueError):
+            PersisterMetrics(dump_format='xml')
@@ -0,0 +1,156 @@
+"""Test cases for persisters."""
+import os
+from time import sleep
+import pytest
+from taukit.persistence import PackFile, JSONLinesPersister, ResponseArchivePersister
+from taukit.persistence import CrawlIndex
+
+
+class TestPackFile:
+
+    def test_append_get(self, tmp_path):
+        path = str(tmp_path / 'data.pack')
+        with PackFile(path) as pack:
+            pack.append('a', b'1')
+            pack.append('b', b'2')
+            assert pack.get('a') == b'1'
+            pack.append('a', b'3')
+            assert pack.get('a') == b'3'
+            assert pack.get('c') is None
+        with open(pack.index_path, 'ab') as f:
+            f.write(b'\x00\x01')
+        with PackFile(path) as pack:
+            assert len(pack) == 2
+            assert 'b' in pack
+            assert pack.get('a') == b'3'
+            assert list(pack) == [b'1', b'2', b'3']
+        assert os.path.getsize(pack.index_path) % 16 == 0
+
+    def test_index_past_data(self, tmp_path):
+        path = str(tmp_path / 'data.pack')
+        with PackFile(path) as pack:
+            pack.append('a', b'1')
+            pack.append('b', b'2')
+            offset = pack.append('a', b'3')
+        with open(path, 'r+b') as f:
+            f.truncate(offset + 2)
+        with PackFile(path) as pack:
+            assert len(pack) == 2
+            assert pack.get('a') == b'1'
+            assert pack.get('b') == b'2'
+        assert os.path.getsize(pack.index_path) == 2 * 16
+
+
+class TestJSONLinesPersister:
+
+    def test_metrics(self, tmp_path):
+        persister = JSONLinesPersister('items-{n}.jsonl', str(tmp_path), metrics={
+            'dump_path': str(tmp_path / 'metrics.json'),
+            'dump_interval': 0
+        })
+        n_bytes = persister.persist([{'a': 1}, {'b': 2}])
+        n_bytes += persister.persist([{'c': 3}])
+        metrics = persister.metrics.as_dict()
+        assert metrics['items'] == 3
+        assert metrics['batches'] == 2
+        assert metrics['bytes'] == n_bytes == os.path.getsize(persister.filepath)
+        assert metrics['flush_latency']['count'] == 2
+        assert metrics['encode_time'] > 0
+        assert metrics['write_time'] > 0
+        assert os.path.exists(tmp_path / 'metrics.json')
+
+    def test_fixed_filename(self, tmp_path):
+        for i in range(2):
+            persister = JSONLinesPersister('items.jsonl', str(tmp_path))
+            persister.persist([{'i': i}])
+        assert list(JSONLinesPersister('items.jsonl', str(tmp_path)).load()) == \
+            [{'i': 0}, {'i': 1}]
+
+    def test_load_existing(self, tmp_path):
+        for i in range(2):
+            JSONLinesPersister('items-{n}.jsonl', str(tmp_path)).persist([{'i': i}])
+        persister = JSONLinesPersister('items-{n}.jsonl', str(tmp_path))
+        assert list(persister.load()) == [{'i': 1}]
+        assert sorted(os.listdir(str(tmp_path))) == ['items-1.jsonl', 'items-2.jsonl']
+        with pytest.raises(FileNotFoundError):
+            list(JSONLinesPersister('other-{n}.jsonl', str(tmp_path)).load())
+
+
+class TestResponseArchivePersister:
+
+    def test_persist_load(self, tmp_path):
+        persister = ResponseArchivePersister('responses-{n}.pack', str(tmp_path))
+        responses = [
+            {'url': 'http://example.com/a', 'status': 200,
+             'headers': {'Content-Type': ['text/html']}, 'body': b'<p>a</p>'},
+            {'url': 'http://example.com/b', 'status': 404,
+             'headers': {}, 'body': b'', 'meta': {'depth': 1}}
+        ]
+        n_bytes = persister.persist(responses)
+        assert n_bytes == os.path.getsize(persister.filepath)
+        assert persister.get('http://example.com/b')['status'] == 404
+        assert persister.metrics.items == 2
+        assert persister.metrics.bytes == n_bytes
+        persister.close()
+        records = list(ResponseArchivePersister('x', str(tmp_path)).load(persister.filepath))
+        assert [ r['body'] for r in records ] == [ r['body'] for r in responses ]
+        assert records[0]['headers'] == responses[0]['headers']
+
+    def test_compress_time(self, tmp_path):
+        persister = ResponseArchivePersister('responses.pack', str(tmp_path))
+        pack = persister.pack
+        compress = pack.compress
+        def slow_compress(payload):
+            sleep(.05)
+            return compress(payload)
+        pack.compress = slow_compress
+        persister.persist([{'url': 'http://a.com', 'status': 200, 'headers': {}, 'body': b'a'}])
+        persister.close()
+        assert persister.metrics.encode_time >= .05
+        assert persister.metrics.write_time < .05
+
+    @pytest.mark.parametrize('filename', ['responses.pack', 'responses-{n}.pack'])
+    def test_read_existing(self, tmp_path, filename):
+        persister = ResponseArchivePersister(filename, str(tmp_path))
+        persister.persist([{'url': 'http://a.com', 'status': 200, 'headers': {}, 'body': b'a'}])
+        persister.close()
+        files = sorted(os.listdir(str(tmp_path)))
+        persister = ResponseArchivePersister(filename, str(tmp_path))
+        assert persister.get('http://a.com')['body'] == b'a'
+        assert persister.get('http://b.com') is None
+        persister.close()
+        persister = ResponseArchivePersister(filename, str(tmp_path))
+        assert [ r['body'] for r in persister.load() ] == [b'a']
+        assert sorted(os.listdir(str(tmp_path))) == files
+        assert ResponseArchivePersister('other.pack', str(tmp_path)).get('http://a.com') is None
+
+    def test_load_readonly(self, tmp_path):
+        persister = ResponseArchivePersister('responses.pack', str(tmp_path))
+        persister.persist([{'url': 'http://a.com', 'status': 200, 'headers': {}, 'body': b'a'}])
+        persister.close()
+        os.remove(persister.filepath+'.idx')
+        mtime = os.path.getmtime(persister.filepath)
+        records = list(ResponseArchivePersister('x', str(tmp_path)).load(persister.filepath))
+        assert [ r['body'] for r in records ] == [b'a']
+        assert os.listdir(str(tmp_path)) == ['responses.pack']
+        assert os.path.getmtime(persister.filepath) == mtime
+
+
+class TestCrawlIndex:
+
+    def test_update_get(self, tmp_path):
+        path = str(tmp_path / 'index' / 'crawl.db')
+        with CrawlIndex(path, commit_every=2) as index:
+            assert index.get('http://a.com/') is None
+            assert index.conditional_headers('http://a.com/') == {}
+            index.update('http://a.com/', etag='"x"', digest=index.digest(b'a'))
+            index.update('http://b.com/', last_modified='Mon, 01 Jan 2018 00:00:00 GMT')
+            index.update('http://c.com/', etag='"c"')
+        with CrawlIndex(path) as index:
+            assert len(index) == 3
+            assert 'http://c.com/' in index
+            assert index.get('http://a.com/')['digest'] == index.digest(b'a')
+            assert index.conditional_headers('http://a.com/') == {'If-None-Match': '"x"'}
+            assert index.conditional_headers('http://b.com/') == {
+                'If-Modified-Since': 'Mon, 01 Jan 2018 00:00:00 GMT'
+            }
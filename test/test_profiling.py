@@ -0,0 +1,62 @@
+"""Unit tests for profiling."""
+import pytest
+from taukit import profiling
+from taukit.profiling import Profiler, get_profiler, load_profile, open_profile
+
+
+def work(n=20000):
+    return sum(len(str(i)) for i in range(n))
+
+
+class TestProfiler:
+
+    def test_cprofile(self, tmp_path):
+        path = str(tmp_path / 'out' / 'run')
+        with Profiler(path) as profiler:
+            data = [ str(i) * 10 for i in range(1000) ]
+            work()
+        assert sorted(profiler.files) == ['alloc', 'pstats', 'tracemalloc']
+        results = load_profile(path)
+        assert sorted(results) == ['allocations', 'snapshot', 'stats']
+        assert any(f[2] == 'work' for f in results['stats'].stats)
+        assert 'Peak traced memory' in results['allocations']
+        assert results['snapshot'].statistics('lineno')
+        assert data
+
+    def test_sample(self, tmp_path):
+        path = str(tmp_path / 'run')
+        with Profiler(path, mode='sample', memory=False, interval=.001) as profiler:
+            while not profiler.samples:
+                work()
+        assert sorted(profiler.files) == ['samples']
+        samples = load_profile(path)['samples']
+        assert samples == profiler.samples
+        assert any('work' in stack for stack in samples)
+
+    def test_bad_mode(self, tmp_path):
+        with pytest.raises(ValueError):
+            Profiler(str(tmp_path / 'run'), mode='foo')
+
+
+def test_get_profiler(monkeypatch, tmp_path):
+    monkeypatch.delenv(profiling.PROFILE_ENV, raising=False)
+    assert get_profiler() is None
+    monkeypatch.setenv(profiling.PROFILE_ENV, str(tmp_path / 'run'))
+    monkeypatch.setenv(profiling.PROFILE_MODE_ENV, 'sample')
+    profiler = get_profiler()
+    assert profiler.path == str(tmp_path / 'run')
+    assert profiler.mode == 'sample'
+    assert get_profiler(mode='cprofile').mode == 'cprofile'
+
+def test_open_profile(monkeypatch, tmp_path):
+    path = str(tmp_path / 'run')
+    with pytest.raises(FileNotFoundError):
+        open_profile(path)
+    with Profiler(path, memory=False):
+        work()
+    namespaces = []
+    def start_python_console(namespace, banner, shells):
+        namespaces.append(namespace)
+    monkeypatch.setattr('taukit.cli.console.start_python_console', start_python_console)
+    open_profile(path)
+    assert list(namespaces[0]) == ['stats']
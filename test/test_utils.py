@@ -1,6 +1,11 @@
 """Test cases for various utility functions."""
+import os
+import copy
+import pickle
 import pytest
-from taukit.utils import import_python
+from taukit.utils import import_python, is_python_path, resolve_many, LazyPython
+from taukit.utils import iter_unique, make_filepath, make_path, make_paths, is_file
+from taukit.utils import clear_path_cache, find_filepath
 import taukit.base.metacls
 from taukit.base.metacls import Composable
 
@@ -15,3 +20,111 @@ def test_import_python(path, package, expected):
     """Test cases for `import_python`."""
     output = import_python(path, package)
     assert output == expected
+
+@pytest.mark.parametrize('iterable,maxsize,expected', [
+    ([1, 2, 1, 3, 2], None, [1, 2, 3]),
+    ([{'a': 1, 'b': 2}, [1], {'b': 2, 'a': 1}, [1], 'x'], None, [{'a': 1, 'b': 2}, [1], 'x']),
+    ([1, 2, 1, 3, 1, 2], 1, [1, 2, 1, 3, 1, 2]),
+    ([1, 2, 1, 3, 1, 2], 2, [1, 2, 3, 2])
+])
+def test_iter_unique(iterable, maxsize, expected):
+    """Test cases for `iter_unique`."""
+    output = list(iter_unique(iterable, maxsize=maxsize))
+    assert output == expected
+
+@pytest.mark.parametrize('path,object_only,expected', [
+    ('taukit.base.metacls', False, True),
+    ('taukit.base.metacls', True, False),
+    ('.base.metacls:Composable', True, True),
+    ('taukit:base:metacls', False, False),
+    ('taukit.base.metacls:', False, False),
+    ('taukit/base', False, False)
+])
+def test_is_python_path(path, object_only, expected):
+    """Test cases for `is_python_path`."""
+    assert is_python_path(path, object_only) == expected
+
+def test_resolve_many():
+    """Test cases for `resolve_many`."""
+    paths = [
+        '.base.metacls:Composable',
+        '.base:metacls',
+        '.base.metacls:Composable.__new__'
+    ]
+    output = resolve_many(paths, 'taukit')
+    assert output == [ Composable, taukit.base.metacls, Composable.__new__ ]
+    proxies = resolve_many(paths, 'taukit', lazy=True)
+    assert isinstance(proxies[0], LazyPython)
+    assert proxies[0].resolve() is Composable
+    assert proxies[1].Composable is Composable
+
+def test_lazy_python_copy():
+    """Test cases for copying and pickling `LazyPython` proxies."""
+    proxy = LazyPython('taukit.base.metacls:Composable')
+    clone = pickle.loads(pickle.dumps(proxy))
+    assert clone.path == proxy.path
+    assert clone.resolve() is Composable
+    assert copy.copy(proxy).resolve() is Composable
+    assert copy.copy(clone).__name__ == 'Composable'
+
+@pytest.mark.parametrize('filename,existing,kwds,expected', [
+    ('file-{n}.txt', [], {}, 'file-1.txt'),
+    ('file-{n}.txt', ['file-1.txt', 'file-2.txt', 'file-4.txt'], {}, 'file-3.txt'),
+    ('{name}-{n:03d}.txt', ['a-001.txt', 'b-002.txt'], {'name': 'a'}, 'a-002.txt'),
+    ('file.txt', ['file.txt'], {}, 'file.txt'),
+    ('file-{n:x}.txt', [ f'file-{n:x}.txt' for n in range(1, 11) ], {}, 'file-b.txt'),
+    ('file-{n:>3}.txt', ['file-  1.txt'], {}, 'file-  2.txt')
+])
+def test_make_filepath(tmp_path, filename, existing, kwds, expected):
+    """Test cases for `make_filepath`."""
+    for name in existing:
+        (tmp_path / name).touch()
+    output = make_filepath(filename, str(tmp_path), **kwds)
+    assert output == str(tmp_path / expected)
+
+def test_make_filepath_create(tmp_path):
+    """Test cases for `make_filepath` with atomic file creation."""
+    dirpath = str(tmp_path)
+    paths = [ make_filepath('file-{n}.txt', dirpath, create=True) for _ in range(3) ]
+    assert paths == [ os.path.join(dirpath, f'file-{n}.txt') for n in range(1, 4) ]
+    assert all(os.path.isfile(p) for p in paths)
+    with pytest.raises(FileExistsError):
+        make_filepath('file-1.txt', dirpath, create=True)
+
+@pytest.mark.parametrize('filename,existing,expected', [
+    ('file-{n}.txt', [], None),
+    ('file-{n}.txt', ['file-1.txt', 'file-10.txt', 'file-2.txt'], 'file-10.txt'),
+    ('file-{n:03}.txt', ['file-001.txt', 'file-002.txt'], 'file-002.txt'),
+    ('file.txt', [], None),
+    ('file.txt', ['file.txt'], 'file.txt')
+])
+def test_find_filepath(tmp_path, filename, existing, expected):
+    """Test cases for `find_filepath`."""
+    for name in existing:
+        (tmp_path / name).touch()
+    output = find_filepath(filename, str(tmp_path))
+    assert output == (str(tmp_path / expected) if expected else None)
+    assert sorted(os.listdir(str(tmp_path))) == sorted(existing)
+
+def test_make_path_cache(tmp_path):
+    """Test cases for directory caching in `make_path`."""
+    dirpath = str(tmp_path / 'a' / 'b')
+    paths = make_paths([ (dirpath, 'x.txt'), os.path.join(dirpath, 'y.txt') ])
+    assert paths == [ os.path.join(dirpath, 'x.txt'), os.path.join(dirpath, 'y.txt') ]
+    assert os.path.isdir(dirpath)
+    assert not is_file(dirpath)
+    os.rmdir(dirpath)
+    make_path(dirpath, 'x.txt')
+    assert not os.path.exists(dirpath)
+    clear_path_cache(str(tmp_path / 'a'))
+    make_path(dirpath, 'x.txt')
+    assert os.path.isdir(dirpath)
+
+def test_make_path_no_stat(tmp_path, monkeypatch):
+    """Test that file paths in known directories are not checked."""
+    dirpath = str(tmp_path / 'c')
+    make_path(dirpath, 'x.txt')
+    def stat(*args, **kwds):
+        raise AssertionError("os.stat called")
+    monkeypatch.setattr(os, 'stat', stat)
+    assert make_path(dirpath, 'y.txt') == os.path.join(dirpath, 'y.txt')
@@ -0,0 +1,40 @@
+"""Benchmarks for middlewares."""
+import re
+import pytest
+from scrapy import Spider, Request
+from scrapy.http import HtmlResponse
+from taukit.webscraping.middlewares import OffsiteFinalUrlDownloaderMiddleware
+
+
+class OffsiteSpider(Spider):
+    name = 'benchmark_spider'
+    allowed_domains = [ f'example{i}.com' for i in range(10) ]
+    blacklist_urls = [
+        *( f'https://example0.com/blacklisted/{i}' for i in range(10) ),
+        *( re.compile(rf"/forbidden/{i}/") for i in range(10) )
+    ]
+
+
+@pytest.mark.benchmark(group='webscraping-middlewares')
+class BenchmarkOffsiteFinalUrlDownloaderMiddleware:
+
+    pairs = [
+        (Request(url), HtmlResponse(url, body=b'<html></html>'))
+        for url in ( f'https://www.example{i % 10}.com/page/{i}' for i in range(100) )
+    ]
+
+    def benchmark_process_request(self, benchmark):
+        spider = OffsiteSpider()
+        middleware = OffsiteFinalUrlDownloaderMiddleware()
+        def process():
+            for request, _ in self.pairs:
+                middleware.process_request(request, spider)
+        benchmark(process)
+
+    def benchmark_process_response(self, benchmark):
+        spider = OffsiteSpider()
+        middleware = OffsiteFinalUrlDownloaderMiddleware()
+        def process():
+            for request, response in self.pairs:
+                middleware.process_response(request, response, spider)
+        benchmark(process)
@@ -0,0 +1,79 @@
+"""Benchmarks for webscraping utilities."""
+import pytest
+from scrapy import Field
+from taukit.webscraping.itemcls import Item as _Item, ItemLoader as _ItemLoader
+from taukit.webscraping.selectors import CSS
+from taukit.webscraping.utils import normalize_web_content, load_item
+from taukit.webscraping.utils import get_url_domain, is_url_in_domains
+from taukit.webscraping.utils import canonicalize_url
+from w3lib.url import canonicalize_url as w3lib_canonicalize_url
+
+HTML = """
+<html>
+<head><title>Benchmark</title></head>
+<body>
+<div class="content">
+<h1>Heading</h1>
+{}
+</div>
+</body>
+</html>
+""".format("\n".join(
+    f"<p>Paragraph <strong>{i}</strong> &amp; some <a href='/{i}'>link</a>.</p>"
+    f"<!-- comment {i} -->\n\t<h2>Section {i}</h2>"
+    for i in range(50)
+))
+
+URLS = [
+    f'https://www{i % 3}.example{i % 10}.co.uk/path/{i}?q={i}#frag'
+    for i in range(100)
+]
+
+
+class Item(_Item):
+    title = Field()
+    content = Field()
+    url = Field()
+
+
+class ItemLoader(_ItemLoader):
+    default_item_class = Item
+    container_sel = CSS(".content")
+    title_sel = CSS("h1::text")
+    content_sel = CSS("p")
+
+
+@pytest.mark.benchmark(group='webscraping-normalize')
+def benchmark_normalize_web_content(benchmark):
+    benchmark(lambda: list(normalize_web_content(HTML)))
+
+
+@pytest.mark.benchmark(group='webscraping-domains')
+class BenchmarkDomains:
+
+    def benchmark_get_url_domain(self, benchmark):
+        benchmark(lambda: [ get_url_domain(url) for url in URLS ])
+
+    def benchmark_is_url_in_domains(self, benchmark):
+        domains = [ f'example{i}.co.uk' for i in range(5) ]
+        benchmark(lambda: [ is_url_in_domains(url, domains) for url in URLS ])
+
+
+@pytest.mark.benchmark(group='webscraping-loader')
+def benchmark_load_item(benchmark):
+    benchmark(load_item, HTML, ItemLoader, url='https://example.com/')
+
+
+@pytest.mark.benchmark(group='webscraping-canonicalize')
+class BenchmarkCanonicalizeUrl:
+
+    canonical = [ f'https://www.example{i % 10}.com/path/{i}?a={i}&b=x' for i in range(100) ]
+
+    def benchmark_w3lib(self, benchmark):
+        benchmark(lambda: [ w3lib_canonicalize_url(url) for url in URLS ])
+
+    def benchmark_cached(self, benchmark):
+        benchmark(lambda: [ canonicalize_url(url) for url in URLS ])
+
+    def benchmark_canonical(self, benchmark):
+        benchmark(lambda: [ canonicalize_url(url) for url in self.canonical ])
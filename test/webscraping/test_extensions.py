@@ -0,0 +1,31 @@
+"""Unit tests for extensions."""
+import pytest
+from scrapy import Spider
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.test import get_crawler
+from taukit.profiling import PROFILE_ENV
+from taukit.webscraping.extensions import ProfilerExtension
+
+
+class ProfiledSpider(Spider):
+    name = 'test_profiled_spider'
+
+
+def test_profiler_extension(tmp_path):
+    crawler = get_crawler(ProfiledSpider, {
+        'TAUKIT_PROFILE': str(tmp_path / '{name}'),
+    })
+    spider = ProfiledSpider()
+    ext = ProfilerExtension.from_crawler(crawler)
+    ext.spider_opened(spider)
+    ''.join(str(i) for i in range(1000))
+    ext.spider_closed(spider)
+    path = str(tmp_path / ProfiledSpider.name)
+    assert crawler.stats.get_value('profile/pstats') == path+'.pstats'
+    assert crawler.stats.get_value('profile/alloc') == path+'.alloc.txt'
+    assert not ext.profilers
+
+def test_profiler_extension_disabled(monkeypatch):
+    monkeypatch.delenv(PROFILE_ENV, raising=False)
+    with pytest.raises(NotConfigured):
+        ProfilerExtension.from_crawler(get_crawler(ProfiledSpider))
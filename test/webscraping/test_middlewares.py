@@ -0,0 +1,119 @@
+"""Unit tests for middlewares."""
+import re
+import pytest
+from scrapy import Spider, Request
+from scrapy.exceptions import IgnoreRequest
+from scrapy.http import HtmlResponse, TextResponse
+from scrapy.settings import Settings
+from taukit.webscraping.middlewares import PackFileCacheStorage, UrlMatcher
+from taukit.webscraping.middlewares import OffsiteFinalUrlDownloaderMiddleware
+
+
+class CacheSpider(Spider):
+    name = 'test_cache_spider'
+
+
+class OffsiteSpider(Spider):
+    name = 'test_offsite_spider'
+    allowed_domains = ['example.com', 'example.co.uk']
+    blacklist_urls = [
+        'http://example.com/bad',
+        re.compile(r"/private/"),
+        re.compile(r"\?session=", re.I),
+        re.compile(r"LOGIN", re.I)
+    ]
+
+
+class TestUrlMatcher:
+
+    @pytest.mark.parametrize('url,allowed', [
+        ('http://example.com/', True),
+        ('http://www.example.co.uk/a', True),
+        ('http://example.org/', False),
+        ('http://example.com/bad', False),
+        ('http://EXAMPLE.com/bad#x', False),
+        ('http://example.com/bad/not', True),
+        ('http://example.com/x/private/y', False),
+        ('http://example.com/x?SESSION=1', False),
+        ('http://example.com/login', False)
+    ])
+    def test_is_allowed(self, url, allowed):
+        matcher = UrlMatcher.from_spider(OffsiteSpider())
+        assert len(matcher.patterns) == 2
+        assert matcher.is_allowed(url) is allowed
+
+    @pytest.mark.parametrize('patterns,url,blacklisted', [
+        ([r'(?i)login', r'/private/'], 'http://example.com/LOGIN', True),
+        ([r'(?i)login', r'/private/'], 'http://example.com/x/private/', True),
+        ([r'/(?P<id>\d+)/a', r'/(?P<id>\d+)/b'], 'http://example.com/1/b', True),
+        ([r'/(?P<id>\d+)/a', r'/(?P<id>\d+)/b'], 'http://example.com/1/c', False),
+        ([r'/x/', r'(y)\1'], 'http://example.com/yy', True),
+        ([r'/x/', r'(y)\1'], 'http://example.com/y', False)
+    ])
+    def test_uncombinable_patterns(self, patterns, url, blacklisted):
+        matcher = UrlMatcher(blacklist_urls=[ re.compile(p) for p in patterns ])
+        assert matcher.is_blacklisted(url) is blacklisted
+
+    def test_no_domains(self):
+        matcher = UrlMatcher()
+        assert matcher.is_allowed('http://anything.org/')
+
+
+class TestOffsiteFinalUrlDownloaderMiddleware:
+
+    def test_process_request(self):
+        spider = OffsiteSpider()
+        middleware = OffsiteFinalUrlDownloaderMiddleware()
+        assert middleware.process_request(Request('http://example.com/a'), spider) is None
+        for url in ('http://example.org/', 'http://example.com/bad'):
+            with pytest.raises(IgnoreRequest):
+                middleware.process_request(Request(url), spider)
+        assert middleware.get_matcher(spider) is middleware.get_matcher(spider)
+
+    def test_process_response(self):
+        spider = OffsiteSpider()
+        middleware = OffsiteFinalUrlDownloaderMiddleware()
+        request = Request('http://example.com/a')
+        response = HtmlResponse('http://example.com/b', body=b'')
+        assert middleware.process_response(request, response, spider) is response
+        response = HtmlResponse('http://example.org/b', body=b'')
+        with pytest.raises(IgnoreRequest):
+            middleware.process_response(request, response, spider)
+
+
+class TestPackFileCacheStorage:
+
+    @pytest.fixture
+    def settings(self, tmp_path):
+        return Settings({
+            'HTTPCACHE_DIR': str(tmp_path),
+            'HTTPCACHE_EXPIRATION_SECS': 0
+        })
+
+    def test_store_retrieve(self, settings):
+        spider = CacheSpider()
+        storage = PackFileCacheStorage(settings)
+        storage.open_spider(spider)
+        request = Request('http://example.com/b?y=2&x=1')
+        response = HtmlResponse(request.url, status=200, body=b'<html>foo</html>',
+                                headers={'Content-Type': 'text/html; charset=utf-8'})
+        assert storage.retrieve_response(spider, request) is None
+        storage.store_response(spider, request, response)
+        storage.close_spider(spider)
+        storage = PackFileCacheStorage(settings)
+        storage.open_spider(spider)
+        cached = storage.retrieve_response(spider, Request('http://example.com/b?x=1&y=2'))
+        assert isinstance(cached, TextResponse)
+        assert cached.url == response.url
+        assert cached.status == 200
+        assert cached.body == response.body
+        assert cached.headers == response.headers
+        assert storage.retrieve_response(spider, Request('http://example.com/c')) is None
+        storage.close_spider(spider)
+
+    def test_key_body(self):
+        get_key = PackFileCacheStorage.get_key
+        assert get_key(Request('http://example.com/?b=1&a=2')) == 'GET http://example.com/?a=2&b=1'
+        requests = [ Request('http://example.com', method='POST', body=b) for b in (b'a', b'b') ]
+        assert get_key(requests[0]) != get_key(requests[1])
+        assert get_key(requests[0]).startswith('POST http://example.com/ ')
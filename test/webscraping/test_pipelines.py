@@ -0,0 +1,108 @@
+"""Unit tests for item pipelines."""
+# pylint: disable=W0621
+import pytest
+from twisted.internet import defer
+from scrapy import Spider
+from scrapy.utils.test import get_crawler
+from taukit.persistence import PackFile, load_response_record
+from taukit.webscraping import pipelines
+from taukit.webscraping.pipelines import PersisterPipeline
+
+
+class PipelineSpider(Spider):
+    name = 'test_persister_pipeline'
+
+
+@pytest.fixture
+def crawler(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipelines, 'deferToThread', defer.maybeDeferred)
+    return get_crawler(PipelineSpider, {
+        'TAUKIT_PERSISTER': 'taukit.persistence:JSONLinesPersister',
+        'TAUKIT_PERSISTER_KWDS': {
+            'filename': 'items-{n}.jsonl',
+            'dirpath': str(tmp_path)
+        },
+        'TAUKIT_PERSISTER_BATCH_SIZE': 3
+    })
+
+
+def test_persister_pipeline(crawler):
+    spider = PipelineSpider()
+    pipeline = PersisterPipeline.from_crawler(crawler)
+    pipeline.open_spider(spider)
+    persister = pipeline.persisters[spider]
+    for i in range(7):
+        result = pipeline.process_item({'i': i}, spider)
+        if i % 3 == 2:
+            assert isinstance(result, defer.Deferred)
+            assert result.result == {'i': i}
+        else:
+            assert result == {'i': i}
+    assert len(pipeline.buffers[spider]) == 1
+    d = pipeline.close_spider(spider)
+    assert d.called
+    assert list(persister.load()) == [ {'i': i} for i in range(7) ]
+    stats = crawler.stats
+    assert stats.get_value('persister/items') == 7
+    assert stats.get_value('persister/batches') == 3
+    assert stats.get_value('persister/bytes') == len(''.join(f'{{"i": {i}}}\n' for i in range(7)))
+    assert stats.get_value('persister/encode_time') == persister.metrics.encode_time
+    assert stats.get_value('persister/write_time') == persister.metrics.write_time
+    assert persister.metrics.max_queue_depth == 3
+    assert persister.metrics.queue_depth == 0
+
+
+def test_persister_pipeline_backpressure(crawler, monkeypatch):
+    writes = []
+    def defer_to_thread(f, *args):
+        writes.append(defer.Deferred())
+        return writes[-1]
+    monkeypatch.setattr(pipelines, 'deferToThread', defer_to_thread)
+    spider = PipelineSpider()
+    pipeline = PersisterPipeline.from_crawler(crawler)
+    pipeline.open_spider(spider)
+    items = []
+    for i in range(3):
+        result = pipeline.process_item({'i': i}, spider)
+    result.addCallback(items.append)
+    assert not items
+    assert pipeline.pending[spider] == 3
+    writes[0].callback(None)
+    assert items == [{'i': 2}]
+    assert pipeline.pending[spider] == 0
+
+def test_persister_pipeline_error(crawler):
+    spider = PipelineSpider()
+    pipeline = PersisterPipeline.from_crawler(crawler)
+    pipeline.open_spider(spider)
+    def persist(batch):
+        raise OSError("disk full")
+    pipeline.persisters[spider].persist = persist
+    results = [ pipeline.process_item({'i': i}, spider) for i in range(4) ]
+    assert results[2].result == {'i': 2}
+    pipeline.close_spider(spider)
+    assert crawler.stats.get_value('persister/errors') == 2
+    assert crawler.stats.get_value('persister/dropped_items') == 4
+
+
+def test_persister_pipeline_close(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipelines, 'deferToThread', defer.maybeDeferred)
+    crawler = get_crawler(PipelineSpider, {
+        'TAUKIT_PERSISTER': 'taukit.persistence:ResponseArchivePersister',
+        'TAUKIT_PERSISTER_KWDS': {'filename': 'responses.pack', 'dirpath': str(tmp_path)}
+    })
+    spider = PipelineSpider()
+    pipeline = PersisterPipeline.from_crawler(crawler)
+    pipeline.open_spider(spider)
+    persister = pipeline.persisters[spider]
+    pipeline.process_item({'url': 'http://a.com', 'status': 200, 'headers': {}, 'body': b'a'},
+                          spider)
+    calls = []
+    close, persist = persister.close, persister.persist
+    monkeypatch.setattr(persister, 'close', lambda: calls.append(close() or 'close'))
+    monkeypatch.setattr(persister, 'persist', lambda b: calls.append(persist(b) and 'persist'))
+    pipeline.close_spider(spider)
+    assert calls[-2:] == ['persist', 'close']
+    with PackFile(persister.filepath) as pack:
+        assert len(pack) == 1
+        assert load_response_record(pack.get('http://a.com'))['body'] == b'a'
@@ -1,6 +1,13 @@
 """Unit tests for spider classes."""
 # pylint: disable=unsubscriptable-object
-from scrapy import Field, Spider as _Spider
+import json
+from types import SimpleNamespace
+import pytest
+from scrapy import Field, Request, Spider as _Spider
+from scrapy.exceptions import DontCloseSpider, IgnoreRequest
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+from twisted.python.failure import Failure
 from scrapy.spiders import CrawlSpider as _CrawlSpider, Rule
 from scrapy.linkextractors import LinkExtractor
 from taukit.webscraping.itemcls import Item as _Item, ItemLoader as _ItemLoader
@@ -57,3 +64,168 @@ def test_spider(spider_process):
     assert CrawlSpider.items[0]['final_url'] == CrawlSpider.start_urls[0]
     assert CrawlSpider.items[0]['content'].startswith("Wikipedia is hosted by")
     assert CrawlSpider.items[1]['final_url'] == 'https://wikimediafoundation.org/'
+
+
+def test_parse_item_timing(tmp_path):
+    path = tmp_path/'timing-{name}.json'
+    crawler = get_crawler(Spider, {
+        'TAUKIT_TIMING': True,
+        'TAUKIT_TIMING_EXPORT': str(path)
+    })
+    spider = Spider.from_crawler(crawler)
+    body = b'<div class="footer-sidebar"><p class="footer-sidebar-text">Foo</p></div>'
+    for _ in range(3):
+        url = 'https://www.wikipedia.org'
+        response = HtmlResponse(url, body=body, request=Request(url))
+        item = spider.parse_item(response)
+        assert item['content'] == 'Foo'
+        assert item['final_url'] == 'https://www.wikipedia.org/'
+    spider.closed('finished')
+    stats = crawler.stats
+    prefix = 'timing/test_wiki_spider/ItemLoader'
+    for stage in ('canonicalize', 'loader', 'add_data', 'setup', 'load_item', 'total'):
+        assert stats.get_value(f'{prefix}/{stage}/count') == 3
+        assert stats.get_value(f'{prefix}/{stage}/p99') > 0
+    with open(str(path).format(name=Spider.name)) as stream:
+        summary = json.load(stream)
+    assert summary['ItemLoader']['total']['count'] == 3
+
+def test_parse_item_no_timing():
+    spider = Spider.from_crawler(get_crawler(Spider))
+    assert spider.stage_timer is None
+    spider.closed('finished')
+
+
+class StartSpider(TauSpiderMixin, _Spider):
+    name = 'test_start_spider'
+    urls = [ f'http://{d}.com/{i}' for d in 'ab' for i in range(3) ]
+    def parse_extra_args(self):
+        self.args = SimpleNamespace(test_url=None, limit=None)
+    def get_urls(self):
+        return iter(self.urls)
+
+def test_start_requests_dedup():
+    spider = StartSpider.from_crawler(get_crawler(StartSpider, {
+        'TAUKIT_DEDUP_START_URLS': True
+    }))
+    spider.urls = ['http://a.com/?x=1&y=2', 'http://A.com/?y=2&x=1', 'http://b.com']
+    assert [ r.url for r in spider.start_requests() ] == \
+        ['http://a.com/?x=1&y=2', 'http://b.com']
+
+def test_start_requests_interleave():
+    spider = StartSpider.from_crawler(get_crawler(StartSpider))
+    assert [ r.url for r in spider.start_requests() ] == StartSpider.urls
+    spider = StartSpider.from_crawler(get_crawler(StartSpider, {
+        'TAUKIT_INTERLEAVE_DOMAINS': True,
+        'TAUKIT_INTERLEAVE_PRIORITY': True
+    }))
+    requests = list(spider.start_requests())
+    assert [ r.url for r in requests ] == [
+        'http://a.com/0', 'http://b.com/0',
+        'http://a.com/1', 'http://b.com/1',
+        'http://a.com/2', 'http://b.com/2'
+    ]
+    assert [ r.priority for r in requests ] == [0, 0, -1, -1, -2, -2]
+    assert requests[0].meta['data'] == {'url': 'http://a.com/0'}
+    spider = StartSpider.from_crawler(get_crawler(StartSpider, {
+        'TAUKIT_INTERLEAVE_DOMAINS': True,
+        'TAUKIT_INTERLEAVE_BUFFER_SIZE': 2,
+        'TAUKIT_INTERLEAVE_MAX_BUFFERED': 0
+    }))
+    assert [ r.url for r in spider.start_requests() ][:2] == ['http://a.com/0', 'http://a.com/1']
+    spider = StartSpider.from_crawler(get_crawler(StartSpider, {
+        'TAUKIT_INTERLEAVE_DOMAINS': True,
+        'TAUKIT_INTERLEAVE_BUFFER_SIZE': 0,
+        'TAUKIT_INTERLEAVE_MAX_BUFFERED': 4
+    }))
+    assert [ r.url for r in spider.start_requests() ] == [ r.url for r in requests ]
+
+
+def test_incremental(tmp_path, monkeypatch):
+    settings = {'TAUKIT_CRAWL_INDEX': str(tmp_path / '{name}.db')}
+    body = b'<div class="footer-sidebar"><p class="footer-sidebar-text">Foo</p></div>'
+    url = 'https://www.wikipedia.org/?b=1&a=2'
+    def crawl(body, status=200):
+        crawler = get_crawler(Spider, settings)
+        spider = Spider.from_crawler(crawler)
+        request = spider.make_request(url, meta={'data': {}})
+        response = HtmlResponse(url, body=body, status=status, request=request,
+                                headers={'ETag': '"v1"'})
+        item = spider.parse_item(response)
+        spider.closed('finished')
+        return request, item, crawler.stats
+    request, item, stats = crawl(body)
+    assert 'If-None-Match' not in request.headers
+    assert item['content'] == 'Foo'
+    request, item, stats = crawl(body)
+    assert request.headers['If-None-Match'] == b'"v1"'
+    assert request.meta['handle_httpstatus_list'] == [304]
+    assert item is None
+    assert stats.get_value('incremental/unchanged') == 1
+    _, item, stats = crawl(b'', status=304)
+    assert item is None
+    assert stats.get_value('incremental/not_modified') == 1
+    _, item, stats = crawl(body.replace(b'Foo', b'Bar'))
+    assert item['content'] == 'Bar'
+    assert (tmp_path / 'test_wiki_spider.db').exists()
+    def fail(*args, **kwds):
+        raise ValueError
+    with monkeypatch.context() as m:
+        m.setattr(ItemLoader, 'load_item', fail)
+        with pytest.raises(ValueError):
+            crawl(body.replace(b'Foo', b'Baz'))
+    _, item, stats = crawl(body.replace(b'Foo', b'Baz'))
+    assert item['content'] == 'Baz'
+
+
+def test_frontier(tmp_path):
+    settings = {
+        'TAUKIT_FRONTIER': 'taukit.frontier:SQLiteFrontier',
+        'TAUKIT_FRONTIER_KWDS': {'path': str(tmp_path / 'frontier.db')},
+        'TAUKIT_FRONTIER_BATCH_SIZE': 2
+    }
+    spiders = [ StartSpider.from_crawler(get_crawler(StartSpider, settings)) for _ in range(2) ]
+    requests = [], []
+    generators = dict(enumerate(spider.start_requests() for spider in spiders))
+    while generators:
+        for i, gen in list(generators.items()):
+            request = next(gen, None)
+            if request is None:
+                del generators[i]
+            else:
+                requests[i].append(request)
+    urls = [ r.url for r in requests[0] + requests[1] ]
+    assert sorted(urls) == sorted(StartSpider.urls)
+    assert all(r.meta['frontier_url'] == r.url for r in requests[0])
+    assert requests[0][0].errback == spiders[0].frontier_errback
+    spider = spiders[0]
+    with pytest.raises(DontCloseSpider):
+        spider._on_spider_idle(spider)
+    def parse(response):
+        yield {'url': response.url}
+        yield Request(response.url+'/next')
+    spider.parse = parse
+    responses = [ HtmlResponse(r.url, body=b'', request=r) for r in requests[0] ]
+    for response in responses:
+        output = list(response.request.callback(response))
+        assert len(output) == 2
+    spider._flush_frontier_acks()
+    assert spider.frontier.pending() == len(urls)
+    spider._on_item_error(output[0], responses[-1], spider, None)
+    for response in responses:
+        spider._on_item_done(output[0], response, spider)
+    spider._flush_frontier_acks()
+    assert spider.frontier.pending() == len(urls) - len(responses) + 1
+    for request in requests[1]:
+        spiders[1].frontier_ack(request)
+    spiders[1].closed('finished')
+    with pytest.raises(DontCloseSpider):
+        spider._on_spider_idle(spider)
+    for exc in (ConnectionRefusedError(), IgnoreRequest()):
+        failure = Failure(exc)
+        failure.request = responses[-1].request
+        spider.frontier_errback(failure)
+        spider._flush_frontier_acks()
+    assert spider.frontier.pending() == 0
+    spider._on_spider_idle(spider)
+    spider.closed('finished')
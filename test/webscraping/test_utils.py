@@ -0,0 +1,98 @@
+"""Unit tests for webscraping utilities."""
+import pytest
+from scrapy import Field
+from w3lib.url import canonicalize_url as w3lib_canonicalize_url
+from taukit.persistence import ResponseArchivePersister
+from taukit.webscraping.itemcls import Item as _Item, ItemLoader as _ItemLoader
+from taukit.webscraping.selectors import CSS
+from taukit.webscraping.utils import load_archived_items, interleave_domains
+from taukit.webscraping.utils import canonicalize_url, canonicalize_urls
+
+
+class Item(_Item):
+    title = Field()
+
+
+class ItemLoader(_ItemLoader):
+    default_item_class = Item
+    container_sel = CSS("body")
+    title_sel = CSS("h1::text")
+
+
+def test_load_archived_items(tmp_path):
+    persister = ResponseArchivePersister('responses.pack', str(tmp_path))
+    persister.persist([
+        {'url': f'http://example.com/{i}', 'status': 200,
+         'headers': {'Content-Type': ['text/html; charset=utf-8']},
+         'body': f'<html><body><h1>Tytuł {i}</h1></body></html>'.encode('utf-8')}
+        for i in range(3)
+    ])
+    persister.close()
+    items = list(load_archived_items(persister.filepath, ItemLoader))
+    assert [ item['title'] for item in items ] == [ f'Tytuł {i}' for i in range(3) ]
+
+
+def test_interleave_domains():
+    urls = [
+        *( f'http://a.com/{i}' for i in range(4) ),
+        *( f'http://www.b.com/{i}' for i in range(2) ),
+        'http://c.org/0'
+    ]
+    result = list(interleave_domains(urls, buffer_size=10))
+    assert result == [
+        ('http://a.com/0', 0), ('http://www.b.com/0', 0), ('http://c.org/0', 0),
+        ('http://a.com/1', 1), ('http://www.b.com/1', 1),
+        ('http://a.com/2', 2),
+        ('http://a.com/3', 3)
+    ]
+    result = [ u for u, _ in interleave_domains(urls, buffer_size=2) ]
+    assert result[:2] == ['http://a.com/0', 'http://a.com/1']
+    assert sorted(result) == sorted(urls)
+    result = [ u for u, _ in interleave_domains(urls, max_buffered=5) ]
+    assert result[0] == 'http://a.com/0'
+    assert result[1] == 'http://www.b.com/0'
+    assert sorted(result) == sorted(urls)
+
+def test_interleave_domains_sorted():
+    urls = [ f'http://{d}.com/{i}' for d in 'ab' for i in range(4) ]
+    result = [ u for u, _ in interleave_domains(urls, buffer_size=None, max_buffered=6) ]
+    assert result == [ f'http://{d}.com/{i}' for i in range(4) for d in 'ab' ]
+
+def test_interleave_domains_key():
+    pairs = [ ('http://a.com/0', 1), ('http://a.com/1', 2), ('http://b.com/0', 3) ]
+    result = list(interleave_domains(pairs, key=lambda x: x[0]))
+    assert [ p for (_, p), _ in result ] == [1, 3, 2]
+
+
+@pytest.mark.parametrize('url', [
+    'http://example.com/',
+    'http://example.com',
+    'http://Example.com/a',
+    'https://example.com:8080/a/b.html',
+    'http://example.com/a?a=1&b=2',
+    'http://example.com/a?b=2&a=1',
+    'http://example.com/a?a=2&a=1',
+    'http://example.com/a?a&b=1',
+    'http://example.com/a?',
+    'http://example.com/a#frag',
+    'http://example.com/a b?c=d e',
+    'http://example.com/r\u00e9sum\u00e9',
+    'http://example.com/a%2fb?x=%7e',
+    'http://example.com/a;p?x=1',
+    'http://user@example.com/'
+])
+def test_canonicalize_url(url):
+    assert canonicalize_url(url) == w3lib_canonicalize_url(url)
+    assert canonicalize_url(url, keep_fragments=True) == \
+        w3lib_canonicalize_url(url, keep_fragments=True)
+
+def test_canonicalize_url_fast_path():
+    url = 'http://example.com/a/b-c_d.html?a=1&b=2'
+    assert canonicalize_url(url) is url
+
+def test_canonicalize_urls():
+    urls = ['http://a.com/?b=1&a=2', 'http://A.com/?a=2&b=1', 'http://b.com']
+    assert list(canonicalize_urls(urls)) == \
+        ['http://a.com/?a=2&b=1', 'http://a.com/?a=2&b=1', 'http://b.com/']
+    assert list(canonicalize_urls(urls, unique=True)) == \
+        ['http://a.com/?a=2&b=1', 'http://b.com/']